@@ -1,5 +1,14 @@
 from Surface import *
-import matplotlib.pyplot as plt
+from Vlm import *
+from LiftingLine import *
+from Design import *
+from ResultStore import *
+import asyncio
+import copy
+import os
+import select
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 class Avl:
     """
@@ -28,6 +37,19 @@ class Avl:
 
     (use lowercase)
 
+    Set solver to "vlm" to solve with the built-in vortex-lattice solver
+    (see Vlm) instead of the AVL executable.
+
+    The surfaces, sections and controls are indexed (see model_index) for
+    fast lookups such as control_variables. The index follows changes made
+    with add_Surface, add_Section, add_Control, pop and scale; call
+    invalidate after editing the lists or control names directly.
+
+    Set headless to True on compute nodes without a display: every AVL
+    process then starts with its graphics disabled (PLOP G), and draw,
+    plot_treffitz and graphics commands passed to execute raise instead of
+    opening a plot window or writing plot.ps. Use trefftz for the
+    Trefftz-plane loading as numbers.
     """
     text = ""
     pitch_trim = None
@@ -38,6 +60,16 @@ class Avl:
     reference_surface_name = None
     avl_cmd = "avl"
     name = "Chrysopelea"
+    reynolds_tolerance = 0
+    xfoil_workers = 1
+    solver = "avl"
+    headless = False
+    graphics_pattern = re.compile(r'^\s*(g|t|h|plop)\s*$', re.IGNORECASE | re.MULTILINE)
+    result_store = None
+    # bump when parse_output changes so stored results are invalidated
+    parser_version = 1
+    oper_prompt = re.compile(r'\.OPER \(case \d+/\d+\) +c> *')
+    output_pattern = re.compile(r"([^\s=|]+) *= *([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)")
 
     def __init__(self, geom_file=None):
         self.compute_stability = False
@@ -45,6 +77,15 @@ class Avl:
         self.compute_force_dist = False
         self.plot_treffitz = False
         self.surfaces = {}
+        self.results = {}
+        self.converged = False
+        self.failure = None
+        self.stats = Stats()
+        self.vlm = None
+        self.vlm_geometry = None
+        self.force_tables = None
+        self.moment_tables = None
+        self.index = None
         if not (geom_file is None):
             file_obj = open(geom_file)
             text = file_obj.read()
@@ -112,6 +153,14 @@ class Avl:
     def aspect_ratio(self):
         return self.reference_surface().aspect_ratio()
 
+    def geometry(self):
+        """
+        return the derived geometry of every surface as an array with one
+        row per surface, in order, and one column per Surface.geometry_names
+        """
+        return np.array([self.surfaces[s].geometry() for s in self.surfaces]).reshape(-1,\
+                        len(Surface.geometry_names))
+
     def add_Surface(self, surf):
         if type(surf) == str:
             surf = Surface(surf)
@@ -119,6 +168,38 @@ class Avl:
             self.reference_surface_name = surf.name
         surf.parent = self
         self.surfaces[surf.name] = surf
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        forget the model index after a change to the surfaces, sections or
+        controls
+        """
+        self.index = None
+
+    def model_index(self):
+        """
+        return the index of the model, built once after every change: a dict
+        with the surface names in order ('surfaces'), the number of sections
+        of each surface ('sections'), their total ('section_count') and the
+        AVL variable d<n> of each control name ('controls'), numbered in
+        order of first appearance as AVL does. Do not modify it.
+        """
+        if self.index is None:
+            sections = {}
+            controls = {}
+            for name in self.surfaces:
+                surf = self.surfaces[name]
+                sections[name] = len(surf.sections)
+                for sec in surf.sections:
+                    for con in sec.controls:
+                        # AVL reads the name up to the first tab, ignoring spaces
+                        key = str(con.name).replace(" ", "")
+                        if key not in controls:
+                            controls[key] = 'd{}'.format(len(controls) + 1)
+            self.index = {'surfaces': list(sections), 'sections': sections,\
+                          'section_count': sum(sections.values()), 'controls': controls}
+        return self.index
 
     def operations_from_constraints(self):
         operations = ""
@@ -128,60 +209,495 @@ class Avl:
             self.constraints.pop(c)
         return operations
 
-    def execute(self, operations=""):
-        input = open('chrysopelea.avl','w')
-        input.write(str(self))
-        input.close()
-        cmds = open('chrysopelea.ain','w')
-        operations += self.operations_from_constraints()
-        operations += '\nx'
+    def case_constraints(self, case):
+        """
+        return the constraints of a case dict as accepted by set, with
+        control names replaced by their d<n> variables and the pitch trim
+        constraint added if pitch_trim is set.
+        """
+        controls = self.control_variables()
+        constraints = {}
+        for variable in case:
+            constraints[controls.get(variable, variable)] = case[variable]
+        if not (self.pitch_trim is None):
+            d = controls[self.pitch_trim]
+            if d not in constraints:
+                constraints[d] = 'pm 0'
+        return constraints
+
+    def case_defaults(self):
+        """
+        return the constraints of AVL's initial run case: zero angles, rates
+        and control deflections
+        """
+        defaults = {}
+        for variable in ('a', 'b', 'r', 'p', 'y') + tuple(self.control_variables().values()):
+            defaults[variable] = "{} 0".format(variable)
+        return defaults
+
+    def output_operations(self, ws, suffix=""):
+        """
+        return the list of OPER commands that solve the current case and
+        request the outputs selected by the compute_* and plot_* flags.
+        Each entry leaves AVL back at the OPER prompt.
+        """
+        operations = ['x']
         if self.compute_stability:
-            operations += "\nST"
+            operations.append('ST')
         if self.compute_moment_dist:
-            operations += '\nvm\nchrysopelea.amdist'
+            operations.append('vm\n' + ws.path('chrysopelea{}.amdist'.format(suffix)))
         if self.compute_force_dist:
-            operations += '\nfs\nchrysopelea.afdist'
+            operations.append('fs\n' + ws.path('chrysopelea{}.afdist'.format(suffix)))
+        if self.plot_treffitz:
+            if self.headless:
+                raise Exception("No Trefftz plot in headless mode; use trefftz instead.")
+            operations.append('t\nh\n')
+        return operations
+
+    def refuse_graphics(self, where):
+        """
+        raise if plots are requested for runs that cannot show them
+        """
         if self.plot_treffitz:
-            operations += "\nt\nh"
-        operations += '\n'
-        cmd_text = """
-load chrysopelea.avl
+            raise Exception("AVL graphics cannot be used in {}; use trefftz instead.".format(where))
+
+    def refuse_headless(self, operations):
+        """
+        raise if operations contain AVL graphics commands in headless mode
+        """
+        if self.headless and self.graphics_pattern.search(operations):
+            raise Exception("AVL graphics commands cannot be run in headless mode.")
+
+    def graphics_cmds(self):
+        """
+        return the top level commands that turn AVL's graphics off in
+        headless mode
+        """
+        if self.headless:
+            return "plop\ng\n\n"
+        return ""
+
+    def read_output(self, out_text, ws, suffix="", complete=False):
+        """
+        store the results in out_text. Unless complete says that all of it
+        was printed, a stop by the Workspace watchdog makes them unconverged.
+        """
+        with self.stats.phase('parse'):
+            self.output = out_text
+            self.failure = None if complete else ws.failure
+            self.results = self.parse_output(out_text)
+            self.converged = len(self.results) > 0 and self.failure is None
+            if self.converged and self.compute_moment_dist:
+                self.moment_data = ws.read('chrysopelea{}.amdist'.format(suffix))
+            if self.converged and self.compute_force_dist:
+                self.force_data = ws.read('chrysopelea{}.afdist'.format(suffix))
+
+    def section_jobs(self):
+        """
+        set the Reynolds number and attitude of every section for the current
+        angle of attack and group sections needing XFOIL by Section.job_key.
+        Setting reynolds_tolerance to a relative tolerance such as 0.05 rounds
+        section Reynolds numbers onto a logarithmic grid so that nearly equal
+        ones fall in the same group.
+        """
+        alpha = self.angle_of_attack()
+        jobs = {}
+        for surf_name in self.surfaces.keys():
+            surf = self.surfaces[surf_name]
+            surf.set_reynolds()
+            surf.set_attitude(alpha)
+            for sec in surf.sections:
+                if not sec.tabulated():
+                    jobs.setdefault(sec.job_key(), []).append(sec)
+        return jobs
+
+    def share_polars(self, jobs):
+        for secs in jobs.values():
+            for sec in secs[1:]:
+                sec.polar = secs[0].polar
+                sec.converged = secs[0].converged
+                sec.failure = secs[0].failure
+                sec.attempts = secs[0].attempts
+            self.stats.count('shared_xfoil_jobs', len(secs) - 1)
+
+    def execute_sections(self):
+        """
+        run XFOIL on every section at the current angle of attack.
+
+        Sections with identical jobs (same airfoil, Reynolds number, attitude
+        and settings, see section_jobs) share one XFOIL run, whichever
+        surface they belong to. Up to xfoil_workers distinct jobs run at the
+        same time.
+        """
+        if self.reynolds is None:
+            return
+        with self.stats.phase('viscous'):
+            jobs = self.section_jobs()
+            leaders = [secs[0] for secs in jobs.values()]
+            if self.xfoil_workers > 1 and len(leaders) > 1:
+                with ThreadPoolExecutor(max_workers=self.xfoil_workers) as executor:
+                    list(executor.map(Section.execute, leaders))
+            else:
+                for sec in leaders:
+                    sec.execute()
+            self.share_polars(jobs)
+
+    async def execute_sections_async(self):
+        """
+        coroutine version of execute_sections that starts all distinct XFOIL
+        jobs at once; Workspace.max_concurrency bounds how many run together.
+        """
+        if self.reynolds is None:
+            return
+        with self.stats.phase('viscous'):
+            jobs = self.section_jobs()
+            await asyncio.gather(*[secs[0].execute_async() for secs in jobs.values()])
+            self.share_polars(jobs)
+
+    def use_polar_tables(self, reynolds, alphas):
+        """
+        tabulate every distinct airfoil over the given Reynolds numbers and
+        section angles of attack and attach the tables to the sections, so
+        the viscous pass interpolates instead of running XFOIL.
+        Returns the tables keyed by airfoil identity.
+        """
+        tables = {}
+        for surf_name in self.surfaces.keys():
+            for sec in self.surfaces[surf_name].sections:
+                identity = sec.airfoil_identity()
+                if identity not in tables:
+                    tables[identity] = PolarTable.build(sec, reynolds, alphas)
+                sec.polar_table = tables[identity]
+        return tables
+
+    def avl_text(self, ws, operations):
+        """
+        write the current geometry to ws and return the AVL script that loads
+        it and runs the given OPER commands
+        """
+        self.refuse_headless(operations)
+        with self.stats.phase('geometry'):
+            return """
+{}load {}
 oper{}
 
 quit
 
-""".format(operations)
-        cmds.write(cmd_text)
-        cmds.close()
-        subprocess.run(self.avl_cmd + " < chrysopelea.ain > chrysopelea.aout", shell=True)
+""".format(self.graphics_cmds(), ws.write('chrysopelea.avl', str(self)), operations)
 
-        out = open("chrysopelea.aout")
-        out_text = out.read()
-        out.close()
+    def run_avl(self, ws, operations):
+        """
+        load the current geometry in AVL, run the given OPER commands and
+        return everything AVL printed
+        """
+        text = self.avl_text(ws, operations)
+        with self.stats.phase('avl'):
+            out_text = ws.run(self.avl_cmd, text)
+        self.stats.count('avl_runs')
+        return out_text
 
-        if self.compute_moment_dist:
-            out = open("chrysopelea.amdist")
-            self.moment_data = out.read()
-            out.close()
-        if self.compute_force_dist:
-            out = open("chrysopelea.afdist")
-            self.force_data = out.read()
-            out.close()
-
-        self.output = out_text
-
-        if not (self.reynolds is None):
-            for surf_name in self.surfaces.keys():
-                surf = self.surfaces[surf_name]
-                surf.set_reynolds()
-                surf.set_attitude(self.angle_of_attack())
-                surf.execute()
+    async def run_avl_async(self, ws, operations):
+        """
+        coroutine version of run_avl
+        """
+        text = self.avl_text(ws, operations)
+        with self.stats.phase('avl'):
+            out_text = await ws.run_async(self.avl_cmd, text)
+        self.stats.count('avl_runs')
         return out_text
 
+    def case_operations(self, ws, operations=""):
+        """
+        return operations followed by the pending constraints and the output
+        commands, clearing the constraints unless the commands are refused
+        """
+        self.refuse_headless(operations)
+        outputs = self.output_operations(ws)
+        operations += self.operations_from_constraints()
+        for op in outputs:
+            operations += '\n' + op
+        return operations + '\n'
+
+    def vlm_model(self):
+        """
+        return the Vlm lattice of the current geometry, built again only
+        when the geometry has changed
+        """
+        geometry = str(self)
+        if self.vlm is None or self.vlm_geometry != geometry:
+            with self.stats.phase('lattice'):
+                self.vlm = Vlm(self)
+            self.vlm_geometry = geometry
+        return self.vlm
+
+    def solve_vlm(self, operations="", constraints=None):
+        """
+        solve the pending constraints (or the given ones) with the built-in
+        vortex-lattice solver and store the results as execute does
+        """
+        if operations:
+            raise Exception("AVL commands cannot be run with the VLM solver.")
+        if self.compute_moment_dist or self.compute_force_dist or self.plot_treffitz:
+            raise Exception("Distributions and plots need the AVL solver.")
+        if constraints is None:
+            constraints = self.constraints
+            self.constraints = {}
+        model = self.vlm_model()
+        with self.stats.phase('vlm'):
+            self.results = model.solve(constraints, self.compute_stability)
+        self.converged = True
+        self.failure = None
+        self.output = self.results_text(self.results)
+
+    @staticmethod
+    def results_text(results):
+        """
+        return results in the "name = value" form of AVL output, so that
+        parse_output reads them back unchanged
+        """
+        return "Vortex Lattice Output -- Total Forces\n" \
+               + '\n'.join("{} = {!r}".format(n, results[n]) for n in results)
+
+    def store_key(self, operations=""):
+        """
+        return the result_store key of the pending case, or None if it is not
+        to be stored
+        """
+        if self.result_store is None or operations or self.plot_treffitz:
+            return None
+        return ResultStore.key(self, self.constraints)
+
+    def load_result(self, key):
+        """
+        take the results of the pending case from result_store, clearing the
+        constraints; return False if they are not stored
+        """
+        entry = self.result_store.get(key, self.parser_version)
+        if entry is None or (self.compute_force_dist and entry['force_data'] is None)\
+                or (self.compute_moment_dist and entry['moment_data'] is None):
+            self.stats.count('result_store_misses')
+            return False
+        self.stats.count('result_store_hits')
+        self.constraints = {}
+        self.results = entry['results']
+        self.converged = len(self.results) > 0
+        self.failure = None
+        self.output = self.results_text(self.results)
+        if self.compute_force_dist:
+            self.force_data = entry['force_data']
+        if self.compute_moment_dist:
+            self.moment_data = entry['moment_data']
+        return True
+
+    def begin_case(self, operations=""):
+        """
+        return the result_store key and the constraints of the pending case
+        for end_case, or None if the stored results were loaded instead
+        """
+        key = self.store_key(operations)
+        constraints = dict(self.constraints)
+        if not (key is None) and self.load_result(key):
+            return None
+        return key, constraints
+
+    def end_case(self, case):
+        """
+        store the results of the case begun with begin_case unless it failed
+        """
+        key, constraints = case
+        if not (key is None or self.failure):
+            self.save_result(key, constraints)
+
+    def save_result(self, key, constraints):
+        force_data = None
+        moment_data = None
+        if self.converged and self.compute_force_dist:
+            force_data = self.force_data
+        if self.converged and self.compute_moment_dist:
+            moment_data = self.moment_data
+        self.result_store.put(key, self.parser_version, self, constraints, self.results,\
+                              force_data, moment_data)
+
+    def execute(self, operations=""):
+        """
+        run the pending case and the viscous pass, returning AVL's output.
+        If result_store is set and already holds the case, its stored
+        results are used instead of running the solver and the returned
+        output only lists them. A run stopped by the Workspace watchdog
+        leaves its RunFailure in failure and is not converged.
+        """
+        case = self.begin_case(operations)
+        if not (case is None):
+            if self.solver == "vlm":
+                self.solve_vlm(operations)
+            else:
+                with Workspace(stats=self.stats) as ws:
+                    operations = self.case_operations(ws, operations)
+                    self.read_output(self.run_avl(ws, operations), ws)
+            self.end_case(case)
+        if self.converged:
+            self.execute_sections()
+        return self.output
+
+    async def execute_async(self, operations=""):
+        """
+        coroutine version of execute. AVL and the XFOIL runs of the viscous
+        pass are awaited rather than blocking, so many configurations can be
+        analysed concurrently from one thread, e.g. with asyncio.gather.
+        Concurrency is bounded by Workspace.max_concurrency.
+        """
+        case = self.begin_case(operations)
+        if not (case is None):
+            if self.solver == "vlm":
+                self.solve_vlm(operations)
+            else:
+                with Workspace(stats=self.stats) as ws:
+                    operations = self.case_operations(ws, operations)
+                    self.read_output(await self.run_avl_async(ws, operations), ws)
+            self.end_case(case)
+        if self.converged:
+            await self.execute_sections_async()
+        return self.output
+
+    def session(self):
+        """
+        return an AvlSession that keeps one AVL process running for this object
+        """
+        return AvlSession(self)
+
+    def execute_cases(self, cases):
+        """
+        run several cases in a single AVL process and return one Avl object
+        per case holding that case's output.
+
+        Each case is a constraint dict as for sweep. The cases are solved one
+        after the other in the same OPER session, each followed by the
+        output commands selected by the compute_* flags, and the combined
+        output is split at the OPER prompts that end each command. Every
+        variable a case does not constrain is reset first (see
+        case_defaults), so the cases give the same results as separate runs.
+
+        The returned objects share this object's geometry; when reynolds is
+        set each gets its own copy so the viscous pass can run per case. If
+        the Workspace watchdog stops AVL, the cases answered in full keep
+        their results and only the others get the failure.
+        """
+        self.refuse_graphics("batched runs")
+        if self.solver == "vlm":
+            return self.execute_cases_vlm(cases)
+        with Workspace(stats=self.stats) as ws:
+            operations = ""
+            counts = []
+            for n in range(len(cases)):
+                constraints = self.case_defaults()
+                constraints.update(self.case_constraints(cases[n]))
+                groups = ["{}\n{}".format(c, constraints[c]) for c in constraints]
+                groups += self.output_operations(ws, n)
+                operations += ''.join('\n' + g for g in groups)
+                counts.append(len(groups))
+            operations += '\n'
+            # piece k + 1 is the response to command k, complete if a prompt follows
+            responses = self.oper_prompt.split(self.run_avl(ws, operations))[1:]
+            results = []
+            start = 0
+            for n in range(len(cases)):
+                if self.reynolds is None:
+                    avl = copy.copy(self)
+                else:
+                    avl = copy.deepcopy(self)
+                avl.constraints = {}
+                text = ''.join(responses[start:start + counts[n]])
+                start += counts[n]
+                avl.read_output(text, ws, n, start < len(responses))
+                results.append(avl)
+        for avl in results:
+            if avl.converged:
+                avl.execute_sections()
+        return results
+
+    def execute_cases_vlm(self, cases):
+        results = []
+        for case in cases:
+            if self.reynolds is None:
+                avl = copy.copy(self)
+            else:
+                avl = copy.deepcopy(self)
+            avl.constraints = {}
+            avl.solve_vlm(constraints=self.case_constraints(case))
+            avl.execute_sections()
+            results.append(avl)
+        return results
+
+    @staticmethod
+    def case_outputs(avl, outputs):
+        row = {}
+        for name in outputs:
+            try:
+                if callable(getattr(avl, name, None)):
+                    row[name] = getattr(avl, name)()
+                else:
+                    row[name] = avl.get_output(name)
+            except Exception:
+                row[name] = float('nan')
+        return row
+
+    def run_case(self, case, outputs):
+        """
+        execute a copy of this configuration under the constraints in case
+        and return a dict of the requested outputs.
+        Outputs are AVL variable names (see get_output) or names of
+        methods of this class such as drag_coef.
+        """
+        avl = copy.deepcopy(self)
+        avl.constraints = avl.case_constraints(case)
+        avl.execute()
+        return self.case_outputs(avl, outputs)
+
+    def run_cases(self, cases, outputs):
+        """
+        like run_case for a list of cases solved in one AVL process
+        """
+        return [self.case_outputs(avl, outputs) for avl in self.execute_cases(cases)]
+
+    def sweep(self, cases, outputs=('Alpha', 'CLff', 'CDff', 'Cmtot', 'e'), workers=None,\
+              processes=False, batch=1):
+        """
+        run many cases concurrently and return a DataFrame with one row per case.
+
+        Each case is a dict of constraints in the form accepted by set, e.g.
+        {'a': 'c 0.6', 'elevator': 'pm 0', 'b': 'b 2'}. Control surface names
+        are accepted in place of their d<n> variables. Cases run on copies of
+        this object, so its own state is left untouched. workers limits the
+        number of simultaneous AVL processes; processes=True uses a process
+        pool instead of threads. With batch > 1, each AVL process solves that
+        many consecutive cases (see execute_cases) with the same results.
+        Set compute_stability before
+        sweeping to request stability derivatives. Outputs of cases that did
+        not converge are NaN. Plots cannot be requested; see trefftz.
+        """
+        self.refuse_graphics("pooled runs")
+        if processes:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+        with executor:
+            if batch > 1:
+                batches = [cases[n:n + batch] for n in range(0, len(cases), batch)]
+                rows = []
+                for batch_rows in executor.map(self.run_cases, batches,\
+                                               [outputs]*len(batches)):
+                    rows += batch_rows
+            else:
+                rows = list(executor.map(self.run_case, cases, [outputs]*len(cases)))
+        import pandas as pd
+        return pd.DataFrame(rows, columns=list(outputs))
+
     def clear_constraints(self):
         self.constraints = {}
 
     def draw(self):
+        if self.headless:
+            raise Exception("Cannot draw the geometry in headless mode.")
         operations = """
 g
 k"""
@@ -189,20 +705,14 @@ k"""
 
     def pop(self, surfname):
         if surfname in self.surfaces:
+            self.invalidate()
             return self.surfaces.pop(surfname)
 
     def control_variables(self):
-        s = str(self)
-        cs = s.split('CONTROL')[1:]
-        controls = {}
-        n = 1
-        for c in cs:
-            c = re.sub('#.*','',c)
-            c = [cc for cc in re.split('\n|\t', c) if cc != ''][0].replace(" ", "")
-            if c not in controls:
-                controls[c] = 'd{}'.format(n)
-                n += 1
-        return controls
+        """
+        return the dict mapping control names to their AVL variables d<n>
+        """
+        return self.model_index()['controls']
 
     def set(self, variable, constraint):
         self.constraints[variable] = constraint
@@ -225,44 +735,151 @@ k"""
         return self.get_output(variable + control_var)
 
     def get_output(self, variable):
-        text = self.output.split('Vortex Lattice Output -- Total Forces')[-1]
-        try:
-            text = re.split("{} *= *".format(variable),text)[1].split(' ')[0]
-        except:
+        if not self.converged:
+            if self.failure:
+                raise Exception("AVL not converged: {}.".format(self.failure))
             raise Exception("AVL not converged.")
-        return float(text)
+        try:
+            return self.results[variable]
+        except KeyError:
+            raise Exception("No variable {} in AVL output.".format(variable))
 
-    def moment_dist(self, surf=None):
-        if surf is None:
-            surf = self.reference_surface()
-        text = self.moment_data.split(surf.name)[1]
-        text = re.split('\n *\n', text)[0]
-        text = '\n'.join(text.split('\n')[3:])
-        text = re.sub(' +', ',', text)
-        text = re.sub('\n,', '\n', text)
-        text = re.sub('(^,)|(,$)', '', text)
-        f = io.StringIO(text)
-        return pd.read_csv(f)
-
-    def force_dist(self, surf=None):
+    @staticmethod
+    def parse_output(text):
+        """
+        return a dict of every "name = value" pair in the last total forces
+        block of AVL output and everything printed after it: forces,
+        moments, control deflections, stability and control derivatives.
+        Where a name appears twice the first value is kept. The dict is
+        empty if AVL printed no total forces, i.e. did not converge.
+        """
+        blocks = text.split('Vortex Lattice Output -- Total Forces')
+        results = {}
+        if len(blocks) > 1:
+            for name, value in Avl.output_pattern.findall(blocks[-1]):
+                if name not in results:
+                    results[name] = float(value)
+        return results
+
+    @staticmethod
+    def numeric(line):
+        try:
+            return len([float(v) for v in line.split()]) > 1
+        except ValueError:
+            return False
+
+    @staticmethod
+    def parse_tables(text, merge):
+        """
+        return the numeric table in every surface block of an AVL
+        distribution file (fs or vm) as one structured array with a float
+        field per column, plus a dict of per-surface views keyed by surface
+        name. With merge, a surface's YDUP image is appended to it and the
+        rows are sorted by Yle; otherwise only the first block of each name
+        is kept.
+        """
+        groups = {}
+        for block in re.split('Surface *[#:]', text)[1:]:
+            lines = block.split('\n')
+            words = lines[0].split()[1:]
+            if words and words[-1] == '(YDUP)':
+                words.pop()
+            name = ' '.join(words)
+            if not merge and name in groups:
+                continue
+            first = 1
+            while first < len(lines) and not Avl.numeric(lines[first]):
+                first += 1
+            if first == len(lines):
+                continue
+            names = lines[first - 1].replace('c cl', 'c_cl').split()
+            last = first
+            while last < len(lines) and lines[last].strip():
+                last += 1
+            values = np.array(' '.join(lines[first:last]).split(), dtype=float)
+            values = values.reshape(-1, len(names))
+            if name in groups:
+                values = np.concatenate([groups[name][1], values])
+            groups[name] = (names, values)
+        dtype = None
+        arrays = []
+        for name in groups:
+            names, values = groups[name]
+            if merge and 'Yle' in names:
+                values = values[np.argsort(values[:, names.index('Yle')], kind='stable')]
+            arrays.append(values)
+            dtype = np.dtype([(n, float) for n in names])
+        if not arrays:
+            return np.zeros(0), {}
+        data = np.ascontiguousarray(np.concatenate(arrays)).view(dtype).ravel()
+        views = {}
+        start = 0
+        for name, values in zip(groups, arrays):
+            views[name] = data[start:start + len(values)]
+            start += len(values)
+        return data, views
+
+    def distribution(self, kind, surf, dataframe):
+        """
+        return the strip force ('force') or bending moment ('moment') table
+        of surf, parsing the distribution file only once per run
+        """
         if surf is None:
             surf = self.reference_surface()
-        text = self.force_data.split(surf.name)[1]
-        text0 = self.force_data.split("Strip Forces referred to Strip Area, Chord")[1]
-        text0 = re.split('\n *\n', text0)[0]
-        text1 = self.force_data.split("Strip Forces referred to Strip Area, Chord")[2]
-        text1 = re.split('\n *\n', text1)[0]
-        text = text0 + '\n' + '\n'.join(text1.split('\n')[2:-2])
-        text = re.sub(' +', ',', text)
-        text = re.sub('(^,)|(,$)', '', text)
-        f = io.StringIO(text)
-        data = pd.read_csv(f)
-        data.sort_values(axis=0, by='Yle', inplace=True)
+        if not isinstance(surf, str):
+            surf = surf.name
+        with self.stats.phase(kind + '_dist'):
+            text = getattr(self, kind + '_data')
+            cache = getattr(self, kind + '_tables')
+            if cache is None or cache[0] is not text:
+                tables = self.parse_tables(text, kind == 'force')[1]
+                cache = (text, tables)
+                setattr(self, kind + '_tables', cache)
+            table = cache[1][surf]
+            if dataframe:
+                import pandas as pd
+                return pd.DataFrame(table)
+            return table
+
+    def moment_dist(self, surf=None, dataframe=True):
+        """
+        return the shear and bending moment distribution of surf (default the
+        reference surface, by object or name) as a DataFrame, or as a NumPy
+        structured array if dataframe is False
+        """
+        return self.distribution('moment', surf, dataframe)
+
+    def force_dist(self, surf=None, dataframe=True):
+        """
+        return the strip forces of surf (default the reference surface, by
+        object or name) and its YDUP image, sorted by Yle, as a DataFrame, or
+        as a NumPy structured array if dataframe is False
+        """
+        return self.distribution('force', surf, dataframe)
+
+    def trefftz(self, surf=None, dataframe=True):
+        """
+        return the Trefftz-plane loading of surf (default the reference
+        surface) that AVL's Trefftz plot shows, from its strip forces:
+        columns Yle, Zle, c_cl (chord times cl over Cref), cl, cl_norm and
+        ai (induced angle). Needs compute_force_dist, but no graphics.
+        """
+        if not self.compute_force_dist:
+            raise Exception("Set compute_force_dist for Trefftz-plane data.")
+        table = self.force_dist(surf, dataframe=False)
+        fields = ['Yle', 'Zle', 'c_cl', 'cl', 'cl_norm', 'ai']
+        data = np.empty(len(table), dtype=[(f, float) for f in fields])
+        for f in fields:
+            data[f] = table[f]
+        if dataframe:
+            import pandas as pd
+            return pd.DataFrame(data)
         return data
 
     def plot_bending_moment(self, surf=None):
         if surf is None:
             surf = self.reference_surface()
+        import matplotlib.pyplot as plt
         dist = self.moment_dist(surf)
         plt.plot(dist.iloc[:,0], dist.iloc[:,1])
         plt.xlabel('Semispan Location')
@@ -334,4 +951,108 @@ k"""
         self.origin = (self.origin[0]*factor, self.origin[1]*factor, self.origin[2]*factor)
         for s in self.surfaces.keys():
             self.surfaces[s].scale(factor)
+        self.invalidate()
+
+
+
+class AvlSession:
+    """
+    persistent interactive AVL process
+
+    The geometry is written and loaded once; each call to execute then sends
+    only the constraints and output commands for one case through AVL's
+    stdin and reads its stdout until the OPER prompt has come back once per
+    command. Results are stored on the Avl object exactly as Avl.execute
+    stores them, so get_output and the other accessors work unchanged.
+
+    Use as a context manager, or call close when done:
+
+        with a.session() as s:
+            for alpha in range(10):
+                a.set_attitude(alpha=alpha)
+                s.execute()
+                print(a.lift_coef())
+
+    Call load after changing the geometry.
+    """
+    def __init__(self, avl):
+        self.avl = avl
+        self.workspace = Workspace(stats=avl.stats)
+        avl.stats.count('processes')
+        self.process = subprocess.Popen(Workspace.command(avl.avl_cmd), stdin=subprocess.PIPE,\
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,\
+                                        start_new_session=True)
+        # graphics stay off for the whole session in headless mode
+        self.process.stdin.write(avl.graphics_cmds().encode())
+        self.load()
+
+    def __repr__(self):
+        return "AVL session for {}".format(self.avl.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def send(self, commands):
+        """
+        send a list of OPER commands and return everything AVL printed in
+        response, stopping at the OPER prompt that follows the last one.
+        If AVL takes longer than Workspace.timeout seconds to answer, or
+        prints nothing for Workspace.inactivity_timeout seconds, the session
+        is killed.
+        """
+        start = time.monotonic()
+        text = '\n'.join(commands) + '\n'
+        self.process.stdin.write(text.encode())
+        self.process.stdin.flush()
+        out = ""
+        fd = self.process.stdout.fileno()
+        while len(Avl.oper_prompt.findall(out)) < len(commands):
+            wait, reason = self.workspace.wait_time(start)
+            if not (wait is None or select.select([fd], [], [], max(wait, 0))[0]):
+                Workspace.kill(self.process)
+                self.avl.stats.count('timeouts')
+                failure = RunFailure(self.avl.avl_cmd, reason, time.monotonic() - start)
+                raise Exception("AVL session: {}.".format(failure))
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise Exception("AVL session ended unexpectedly.")
+            out += chunk.decode(errors='replace')
+        return out
+
+    def load(self):
+        """
+        write and load the current geometry of the Avl object.
+        Call again after changing the geometry.
+        """
+        path = self.workspace.write('chrysopelea.avl', str(self.avl))
+        return self.send(['\nload {}\noper'.format(path)])
+
+    def execute(self):
+        avl = self.avl
+        ws = self.workspace
+        for name in ('chrysopelea.amdist', 'chrysopelea.afdist'):
+            if os.path.exists(ws.path(name)):
+                os.remove(ws.path(name))
+        outputs = avl.output_operations(ws)
+        commands = []
+        for c in list(avl.constraints):
+            commands.append("{}\n{}".format(c, avl.constraints.pop(c)))
+        commands += outputs
+        with avl.stats.phase('avl'):
+            out_text = self.send(commands)
+        avl.read_output(out_text, ws)
+        if avl.converged:
+            avl.execute_sections()
+        return avl.output
 
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.communicate("\n\nquit\n".encode(), timeout=10)
+            except subprocess.TimeoutExpired:
+                Workspace.kill(self.process)
+                self.process.communicate()
+        self.workspace.cleanup()
@@ -0,0 +1,158 @@
+import itertools
+import json
+import math
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+class Design:
+    """
+    design-of-experiments driver for parametric configurations
+
+    builder is a function taking the design parameters as keyword arguments
+    and returning a ready-to-run Avl object, e.g.
+
+        def build(span, taper):
+            a = Avl()
+            wing = Surface("wing")
+            wing.add_Section(Naca("2412", chord=1))
+            wing.add_Section(Naca("2412", position=(0, span/2, 0), chord=taper))
+            a.add_Surface(wing)
+            return a
+
+        d = Design(build, case={'a': 'c 0.5'}, file_name="wing.jsonl")
+        df = d.run(Design.latin_hypercube(200, seed=1, span=(4, 8), taper=(0.3, 1)))
+
+    Every design is built, solved under the constraints in case (as for
+    Avl.sweep; None uses whatever the builder set) and reduced to outputs,
+    which are AVL variable names or Avl method names. Designs whose build or
+    analysis fails (see analysis_errors) or does not converge get NaN
+    outputs; other errors, such as a TypeError from a builder given a wrong
+    parameter name, propagate.
+
+    With a file_name, each result is appended to that JSON lines file as
+    soon as it is available, and designs already in the file are not run
+    again, so an interrupted run resumes where it stopped when called with
+    the same designs (use a seed for random samples). Failed designs are
+    stored marked as such and run again on resume. With processes=True
+    the builder must be picklable, i.e. defined at module level.
+    """
+    # Chrysopelea reports unconverged or stopped solvers with plain Exception
+    analysis_errors = (ArithmeticError, ValueError, OSError)
+
+    def __init__(self, builder, case=None, outputs=('Alpha', 'CLff', 'CDff', 'Cmtot', 'e'),\
+                 file_name=None):
+        self.builder = builder
+        self.case = case
+        self.outputs = tuple(outputs)
+        self.file_name = file_name
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return "Design sweep of {} with outputs {}".format(self.builder.__name__, self.outputs)
+
+    @staticmethod
+    def grid(**values):
+        """
+        return every combination of the given parameter values, e.g.
+        grid(span=[4, 6, 8], taper=[0.5, 1])
+        """
+        names = list(values)
+        return [dict(zip(names, combination))\
+                for combination in itertools.product(*[values[n] for n in names])]
+
+    @staticmethod
+    def latin_hypercube(n, seed=None, **bounds):
+        """
+        return n designs sampled by Latin hypercube within the given
+        (low, high) bounds, e.g. latin_hypercube(50, span=(4, 8))
+        """
+        rng = random.Random(seed)
+        columns = {}
+        for name in bounds:
+            low, high = bounds[name]
+            strata = list(range(n))
+            rng.shuffle(strata)
+            columns[name] = [low + (high - low)*(s + rng.random())/n for s in strata]
+        return [{name: columns[name][i] for name in bounds} for i in range(n)]
+
+    @staticmethod
+    def key(parameters):
+        return json.dumps(parameters, sort_keys=True)
+
+    @staticmethod
+    def evaluate(builder, parameters, case, outputs):
+        """
+        build and solve one design and return its outputs and whether it
+        failed
+        """
+        try:
+            avl = builder(**parameters)
+            if not (case is None):
+                avl.constraints = avl.case_constraints(case)
+            avl.execute()
+            return avl.case_outputs(avl, outputs), not avl.converged
+        except Exception as e:
+            if not (type(e) is Exception or isinstance(e, Design.analysis_errors)):
+                raise
+            return {name: math.nan for name in outputs}, True
+
+    def completed(self):
+        """
+        return the results of the designs stored in file_name that did not
+        fail, keyed by Design.key
+        """
+        results = {}
+        if self.file_name is None or not os.path.exists(self.file_name):
+            return results
+        f = open(self.file_name)
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # last line of an interrupted write
+                continue
+            if not record.get('failed', False):
+                results[self.key(record['parameters'])] = record['outputs']
+        f.close()
+        return results
+
+    def store(self, parameters, outputs, failed=False):
+        if self.file_name is None:
+            return
+        record = {'parameters': parameters, 'outputs': outputs}
+        if failed:
+            record['failed'] = True
+        with self.lock:
+            f = open(self.file_name, 'a')
+            f.write(json.dumps(record) + '\n')
+            f.close()
+
+    def run(self, designs, workers=None, processes=False):
+        """
+        evaluate a list of parameter dicts, skipping those already stored,
+        and return a DataFrame with one row per design: its parameters
+        followed by the outputs
+        """
+        results = self.completed()
+        pending = [p for p in designs if self.key(p) not in results]
+        if pending:
+            if processes:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers)
+            with executor:
+                futures = {executor.submit(self.evaluate, self.builder, p, self.case,\
+                                           self.outputs): p for p in pending}
+                for future in as_completed(futures):
+                    parameters = futures[future]
+                    outputs, failed = future.result()
+                    results[self.key(parameters)] = outputs
+                    self.store(parameters, outputs, failed)
+        import pandas as pd
+        rows = [dict(p, **results[self.key(p)]) for p in designs]
+        names = []
+        for p in designs:
+            names += [n for n in p if n not in names]
+        return pd.DataFrame(rows, columns=names + [n for n in self.outputs if n not in names])
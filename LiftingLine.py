@@ -0,0 +1,187 @@
+import math
+import numpy as np
+
+class LiftingLine:
+    """
+    Weissinger-type lifting line for quick sizing screens
+
+    The wing is a row of n stations at positions r (3 x n) with chords
+    chord and geometric twist twist (radians), spaced over a span of 1 by
+    default; use from_surface or from_avl to lay it out along an existing
+    surface instead. The influence matrix depends on the geometry only, so
+    set_mesh solves it once for the responses to a unit angle of attack and
+    to the twist; solve then superposes these, without any further linear
+    algebra. Call set_mesh again after changing r, chord or twist.
+
+    solve accepts one angle of attack or an array of them (radians); with
+    an array, kappa, upwash and the coefficients gain a leading axis, one
+    entry per angle. kappa is the circulation per unit freestream speed
+    (negative for positive lift), upwash the induced velocity.
+    """
+
+    def __init__(self, n=100, chord='elipse', scale=0.1, x=0, y='cos', z=0, twist=0):
+        if np.array_equal(y, 'uniform'):
+            selfy = np.linspace(0.5/n, 1 - 0.5/n, n)
+            self.elip = 2*np.sqrt(0.25 - (selfy - 0.5)**2)
+        elif np.array_equal(y, 'cos'):
+            selfy = self.cosine_stations(n)
+            self.elip = np.sin(np.linspace(0, math.pi, n))
+        else:
+            selfy = np.asarray(y, dtype=float)
+            n = len(selfy)
+            self.elip = 2*np.sqrt(np.clip(0.25 - (selfy - 0.5)**2, 0, None))
+
+        selfx = np.zeros(n) + x
+        selfz = np.zeros(n) + z
+        self.r = np.array([selfx, selfy, selfz])
+
+        self.kappa = np.zeros(n)
+        self.upwash = np.zeros(n)
+
+        if np.array_equal(chord, 'uniform'):
+            self.chord = np.zeros(n) + scale
+        elif np.array_equal(chord, 'elipse'):
+            self.chord = scale*np.sqrt(1 - (2*self.r[1] - 1)**2)
+        else:
+            self.chord = np.asarray(chord, dtype=float)
+        self.twist = np.zeros(n) + twist
+        self.set_mesh()
+
+    def __repr__(self):
+        return "Lifting line with {} stations".format(len(self.chord))
+
+    @staticmethod
+    def cosine_stations(n):
+        """
+        return n stations between 0 and 1, bunched towards both tips
+        """
+        yvec = -np.cos(np.linspace(0, math.pi, n + 1))/2
+        return 0.5*(yvec[1:] + yvec[:-1]) + 0.5
+
+    @classmethod
+    def from_surface(cls, surf, n=100):
+        """
+        return a lifting line along the quarter-chord line of surf, including
+        its mirror image if it has a yduplicate, with cosine-spaced stations
+        """
+        y = np.array([sec.position[1] for sec in surf.sections], dtype=float)
+        x = np.array([sec.position[0] + 0.25*sec.chord for sec in surf.sections], dtype=float)
+        z = np.array([sec.position[2] for sec in surf.sections], dtype=float)
+        chord = np.array([sec.chord for sec in surf.sections], dtype=float)
+        twist = np.radians([sec.incidence for sec in surf.sections])
+        if not (surf.yduplicate is None):
+            y = np.concatenate([2*surf.yduplicate - y, y])
+            x, z, chord, twist = [np.concatenate([v, v]) for v in (x, z, chord, twist)]
+        order = np.argsort(y)
+        y, x, z, chord, twist = [v[order] for v in (y, x, z, chord, twist)]
+        stations = y[0] + (y[-1] - y[0])*cls.cosine_stations(n)
+        return cls(chord=np.interp(stations, y, chord), x=np.interp(stations, y, x),\
+                   y=stations, z=np.interp(stations, y, z), twist=np.interp(stations, y, twist))
+
+    @classmethod
+    def from_avl(cls, avl, n=100):
+        """
+        return a lifting line along the reference surface of an Avl object
+        """
+        return cls.from_surface(avl.reference_surface(), n)
+
+    def set_mesh(self):
+        r0, r1 = 2*self.r[:,-1] - self.r[:,-2], 2*self.r[:,0] - self.r[:,1]
+        self.r_minus = (np.concatenate([np.array([r1]).transpose(), self.r[:,:-1]], 1) + self.r)/2
+        self.r_plus = (np.concatenate([self.r[:,1:], np.array([r0]).transpose()], 1) + self.r)/2
+        diff = self.r_plus - self.r_minus
+        self.space = diff[1]
+        self.arcspace = np.sqrt(diff[0]**2 + diff[1]**2 + diff[2]**2)
+        self.arclen = self.arcspace.sum()
+
+        x, y, z = [np.array([c]).transpose() for c in self.r]
+        self.influence = self.vcoef(x, y, z)
+        eqns = -self.influence - np.identity(len(self.chord))/(math.pi*self.chord)
+        # responses to a unit angle of attack and to the twist, from which
+        # any angle follows by superposition
+        unit = np.linalg.solve(eqns, np.column_stack([np.ones(len(self.chord)), self.twist]))
+        self.kappa_alpha, self.kappa_twist = unit.T
+        self.upwash_alpha = self.influence @ self.kappa_alpha
+        self.upwash_twist = self.influence @ self.kappa_twist
+
+    @property
+    def span(self):
+        return sum(self.space)
+    @property
+    def ar(self):
+        return self.span**2/self.area
+    @property
+    def area(self):
+        return sum(self.chord*self.space)
+    @property
+    def CL(self):
+        return -2*np.sum(self.kappa*self.space, axis=-1)/self.area
+    @property
+    def CDi(self):
+        return 2*np.sum(self.kappa*self.upwash*self.space, axis=-1)/self.area
+    @property
+    def L(self):
+        return -np.sum(self.kappa*self.space, axis=-1)
+    @property
+    def D(self):
+        return np.sum(self.kappa*self.upwash*self.space, axis=-1)
+    @property
+    def e(self):
+        return (self.CL**2)/(math.pi*self.ar*self.CDi)
+    @property
+    def lengthwise_e(self):
+        return (2*self.L**2)/(math.pi*self.D*self.arclen**2)
+
+    def vcoef(self, x, y, z):
+        delta_y_plus, delta_z_plus = self.r_plus[1,:] - y, self.r_plus[2,:] - z
+        delta_y_minus, delta_z_minus = self.r_minus[1,:] - y, self.r_minus[2,:] - z
+        lat_dist_plus = np.sqrt(delta_y_plus**2 + delta_z_plus**2)
+        lat_dist_minus = np.sqrt(delta_y_minus**2 + delta_z_minus**2)
+        sweep_effect_plus = 2/math.pi*np.arctan((x - self.r_plus[0,:])/lat_dist_plus) + 1
+        sweep_effect_minus = 2/math.pi*np.arctan((x - self.r_minus[0,:])/lat_dist_minus) + 1
+        return (sweep_effect_plus*delta_y_plus/lat_dist_plus**2 \
+                - sweep_effect_minus*delta_y_minus/lat_dist_minus**2)/(4*math.pi)
+
+    def solve(self, alpha):
+        """
+        solve for one angle of attack or an array of them, in radians
+        """
+        alpha = np.asarray(alpha, dtype=float)[..., np.newaxis]
+        self.kappa = alpha*self.kappa_alpha + self.kappa_twist
+        self.upwash = alpha*self.upwash_alpha + self.upwash_twist
+
+    def solve_no_wash(self, alpha):
+        alpha = np.asarray(alpha, dtype=float)[..., np.newaxis]
+        self.kappa = -math.pi*self.chord*(alpha + self.twist)
+        self.upwash = np.zeros_like(self.kappa)
+
+    def plot(self):
+        import matplotlib.pyplot as plt
+        plt.plot(self.r[1], self.kappa)
+        elip = -self.elip*max(abs(self.kappa))
+        plt.plot(self.r[1], elip)
+        plt.plot(self.r[1], self.upwash)
+
+    def plot_circ(self):
+        import matplotlib.pyplot as plt
+        circ = self.kappa/self.kappa.mean()
+        plt.plot(self.r[1], circ)
+
+    def plot_wash(self):
+        import matplotlib.pyplot as plt
+        wash = self.upwash/self.upwash.min()
+        plt.plot(self.r[1], wash)
+
+    def plot_planform(self):
+        import matplotlib.pyplot as plt
+        plt.axis('equal')
+        plt.scatter(self.r[0], self.r[1], color='k')
+        plt.scatter(self.r_plus[0], self.r_plus[1], color='r')
+        plt.scatter(self.r_minus[0], self.r_minus[1], color='r')
+        plt.plot(self.r[0] + 0.75*self.chord, self.r[1], color='b')
+        plt.plot(self.r[0] - 0.25*self.chord, self.r[1], color='b')
+
+    def print(self):
+        print("cl", self.CL, "cdi", self.CDi)
+        print("ar", self.ar)
+        print("e", self.e)
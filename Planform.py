@@ -0,0 +1,104 @@
+import math
+import numpy as np
+
+class Planform:
+    """
+    array view of the sections of one surface, or of a batch of surfaces
+
+    position holds the section leading edges with shape (..., n, 3), chord
+    and incidence have shape (..., n) and yduplicate is the y of the
+    mirror plane, NaN for surfaces without an image, with the leading shape
+    (...). With 2D chords every row is one design variant, e.g. for
+    screening thousands of planforms at once:
+
+        chord = np.column_stack([np.ones(1000), np.linspace(0.2, 1, 1000)])
+        y = np.column_stack([np.zeros(1000), np.full(1000, 3)])
+        p = Planform(np.stack([np.zeros_like(y), y, np.zeros_like(y)], -1), chord)
+        p.aspect_ratio()
+
+    All properties are vectorized over the variants and return one value
+    per variant, NaN or inf where they are undefined. They follow the
+    Surface methods of the same name.
+    """
+
+    def __init__(self, position, chord, incidence=None, yduplicate=0):
+        self.position = np.asarray(position, dtype=float)
+        self.chord = np.asarray(chord, dtype=float)
+        if incidence is None:
+            incidence = np.zeros(self.chord.shape)
+        self.incidence = np.asarray(incidence, dtype=float)
+        if yduplicate is None:
+            yduplicate = math.nan
+        self.yduplicate = np.asarray(yduplicate, dtype=float)
+
+    def __repr__(self):
+        return "Planform of {} sections".format(self.chord.shape)
+
+    @classmethod
+    def from_surface(cls, surf):
+        return cls([s.position for s in surf.sections], [s.chord for s in surf.sections],\
+                   [s.incidence for s in surf.sections], surf.yduplicate)
+
+    @classmethod
+    def batch(cls, surfaces):
+        """
+        return the planform of a list of surfaces with equal numbers of
+        sections, one row per surface
+        """
+        counts = set(len(surf.sections) for surf in surfaces)
+        if len(counts) > 1:
+            raise Exception("Surfaces in a batch need the same number of sections.")
+        planforms = [cls.from_surface(surf) for surf in surfaces]
+        return cls(np.array([p.position for p in planforms]),\
+                   np.array([p.chord for p in planforms]),\
+                   np.array([p.incidence for p in planforms]),\
+                   np.array([p.yduplicate for p in planforms]))
+
+    def mirror_factor(self):
+        return np.where(np.isnan(self.yduplicate), 1, 2)
+
+    def strip_widths(self):
+        """
+        return the distance between neighbouring sections in the y-z plane
+        """
+        return np.hypot(np.diff(self.position[..., 1], axis=-1),\
+                        np.diff(self.position[..., 2], axis=-1))
+
+    def area(self):
+        """
+        return the planform area
+        """
+        width = np.abs(np.diff(self.position[..., 1], axis=-1))
+        chords = self.chord[..., 1:] + self.chord[..., :-1]
+        return 0.5*np.sum(width*chords, axis=-1)*self.mirror_factor()
+
+    def span(self):
+        y = self.position[..., 1]
+        mirrored = 2*np.max(np.abs(y - self.yduplicate[..., np.newaxis]), axis=-1)
+        return np.where(np.isnan(self.yduplicate), np.ptp(y, axis=-1), mirrored)
+
+    def mean_chord(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.area()/self.span()
+
+    def mean_aerodynamic_chord(self):
+        c0 = self.chord[..., :-1]
+        c1 = self.chord[..., 1:]
+        # exact integral of the squared chord over a linearly tapered strip
+        total = np.sum((c0**2 + c0*c1 + c1**2)/3*self.strip_widths(), axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return total*self.mirror_factor()/self.area()
+
+    def aspect_ratio(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.span()**2/self.area()
+
+    def drag_coef(self, cd):
+        """
+        return the viscous drag coefficient, referred to the planform area,
+        of the section drag coefficients cd (shaped like chord)
+        """
+        f = np.asarray(cd, dtype=float)*self.chord
+        c = np.sum(0.5*(f[..., 1:] + f[..., :-1])*self.strip_widths(), axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return c*self.mirror_factor()/self.area()
@@ -0,0 +1,159 @@
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+class PolarCache:
+    """
+    persistent store of XFOIL polars
+
+    Polars are keyed by a hash of everything that determines an XFOIL run
+    (see Section.job_key): the airfoil itself, Reynolds number, Mach number,
+    attitude command, iteration limit and any extra commands. They are kept
+    in an sqlite file, with the most recently used entries also held in
+    memory. Activate for all sections with
+
+        Section.polar_cache = PolarCache("polars.sqlite")
+
+    max_entries bounds the file and memory_entries the in-memory copy; the
+    least recently used polars are evicted first. The raw polar text is
+    stored, so cached results parse exactly like fresh ones. Runs stopped by
+    the Workspace watchdog are not stored.
+    """
+
+    def __init__(self, file_name="chrysopelea_polars.sqlite", max_entries=100000,\
+                 memory_entries=1000):
+        self.file_name = file_name
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.pid = None
+        self.db = None
+
+    def __repr__(self):
+        return "XFOIL polar cache in {}".format(self.file_name)
+
+    def __len__(self):
+        with self.lock:
+            return self.connection().execute("SELECT COUNT(*) FROM polars").fetchone()[0]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['lock'] = None
+        state['db'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def connection(self):
+        # sqlite connections must not cross a fork, so reconnect per process
+        if self.db is None or self.pid != os.getpid():
+            self.db = sqlite3.connect(self.file_name, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS polars "
+                            "(key TEXT PRIMARY KEY, identity TEXT, polar TEXT, used REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS polars_used ON polars (used)")
+            self.pid = os.getpid()
+        return self.db
+
+    @staticmethod
+    def key(section):
+        return hashlib.sha256(repr(section.job_key()).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        return the stored polar text for key, or None
+        """
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+            db = self.connection()
+            row = db.execute("SELECT polar FROM polars WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE polars SET used = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+            self.hits += 1
+            self.remember(key, row[0])
+            return row[0]
+
+    def put(self, key, identity, text):
+        with self.lock:
+            db = self.connection()
+            db.execute("INSERT OR REPLACE INTO polars VALUES (?, ?, ?, ?)",\
+                       (key, identity, text, time.time()))
+            count = db.execute("SELECT COUNT(*) FROM polars").fetchone()[0]
+            if count > self.max_entries:
+                db.execute("DELETE FROM polars WHERE key IN "
+                           "(SELECT key FROM polars ORDER BY used LIMIT ?)",\
+                           (count - self.max_entries,))
+            db.commit()
+            self.remember(key, text)
+
+    def remember(self, key, text):
+        self.memory[key] = text
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    @staticmethod
+    def count(section, text):
+        if text is None:
+            section.recorder().count('polar_cache_misses')
+        else:
+            section.recorder().count('polar_cache_hits')
+
+    def polar(self, section):
+        """
+        return the polar text for the section's current job, running XFOIL
+        only if it is not stored yet.
+        """
+        key = self.key(section)
+        text = self.get(key)
+        self.count(section, text)
+        if text is None:
+            text = section.solve()
+            if section.failure is None:
+                self.put(key, section.airfoil_identity(), text)
+        return text
+
+    async def polar_async(self, section):
+        """
+        coroutine version of polar
+        """
+        key = self.key(section)
+        text = self.get(key)
+        self.count(section, text)
+        if text is None:
+            text = await section.solve_async()
+            if section.failure is None:
+                self.put(key, section.airfoil_identity(), text)
+        return text
+
+    def invalidate(self, section=None):
+        """
+        forget every polar of the section's airfoil, or all polars if no
+        section is given.
+        """
+        with self.lock:
+            db = self.connection()
+            if section is None:
+                db.execute("DELETE FROM polars")
+                self.memory.clear()
+            else:
+                identity = section.airfoil_identity()
+                keys = [r[0] for r in db.execute("SELECT key FROM polars WHERE identity = ?",\
+                                                 (identity,))]
+                db.execute("DELETE FROM polars WHERE identity = ?", (identity,))
+                for key in keys:
+                    self.memory.pop(key, None)
+            db.commit()
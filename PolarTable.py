@@ -0,0 +1,92 @@
+import numpy as np
+
+class PolarTable:
+    """
+    polar of one airfoil tabulated over Reynolds number and angle of attack
+
+    Build once with PolarTable.build (one XFOIL run per Reynolds number),
+    optionally save it to disk, then assign it to the polar_table attribute
+    of every section using that airfoil. Those sections interpolate their
+    coefficients from the table instead of running XFOIL.
+
+    Interpolation is bilinear in log(Reynolds) and alpha and accepts NumPy
+    arrays of any matching shape. Points outside the table, or next to a
+    tabulated point where XFOIL did not converge, come out as NaN; use
+    flags to tell the two cases apart.
+    """
+    columns = ('CL', 'CD', 'CDp', 'CM', 'Top_Xtr', 'Bot_Xtr')
+
+    def __init__(self, reynolds, alphas, data):
+        self.reynolds = np.asarray(reynolds, dtype=float)
+        self.alphas = np.asarray(alphas, dtype=float)
+        self.data = {c: np.asarray(data[c], dtype=float) for c in self.columns}
+
+    def __repr__(self):
+        return "Polar table with {} Reynolds numbers from {:g} to {:g} and {} angles "\
+               "from {:g} to {:g}".format(len(self.reynolds), self.reynolds[0],\
+               self.reynolds[-1], len(self.alphas), self.alphas[0], self.alphas[-1])
+
+    @classmethod
+    def build(cls, section, reynolds, alphas):
+        """
+        tabulate the airfoil of section with one polar_sweep per Reynolds number
+        """
+        reynolds = np.sort(np.asarray(reynolds, dtype=float))
+        alphas = np.sort(np.asarray(alphas, dtype=float))
+        data = {c: np.full((len(reynolds), len(alphas)), np.nan) for c in cls.columns}
+        for i in range(len(reynolds)):
+            polar = section.polar_sweep(alphas=list(alphas), reynolds=int(reynolds[i]))
+            found = polar['alpha'].to_numpy()
+            j = np.abs(alphas[np.newaxis, :] - found[:, np.newaxis]).argmin(axis=1)
+            for c in cls.columns:
+                data[c][i, j] = polar[c].to_numpy()
+        return cls(reynolds, alphas, data)
+
+    def save(self, file_name):
+        np.savez(file_name, reynolds=self.reynolds, alphas=self.alphas, **self.data)
+
+    @classmethod
+    def load(cls, file_name):
+        f = np.load(file_name)
+        return cls(f['reynolds'], f['alphas'], {c: f[c] for c in cls.columns})
+
+    @staticmethod
+    def locate(grid, x):
+        """
+        return lower indices, upper indices and weights of x in grid, plus a
+        mask of points outside the grid
+        """
+        i0 = np.clip(np.searchsorted(grid, x, side='right') - 1, 0, len(grid) - 1)
+        i1 = np.minimum(i0 + 1, len(grid) - 1)
+        span = grid[i1] - grid[i0]
+        t = np.where(span > 0, (x - grid[i0])/np.where(span > 0, span, 1), 0)
+        # on a grid point the next one has no weight and must not spread a NaN
+        i1 = np.where(t > 0, i1, i0)
+        outside = (x < grid[0]) | (x > grid[-1])
+        return i0, i1, t, outside
+
+    def weights(self, reynolds, alpha):
+        reynolds, alpha = np.broadcast_arrays(np.asarray(reynolds, dtype=float),\
+                                              np.asarray(alpha, dtype=float))
+        r = self.locate(np.log(self.reynolds), np.log(reynolds))
+        a = self.locate(self.alphas, alpha)
+        return r, a, r[3] | a[3]
+
+    def interpolate(self, column, reynolds, alpha):
+        """
+        return column (e.g. 'CD') at the given Reynolds numbers and angles
+        """
+        (i0, i1, tr, _), (j0, j1, ta, _), outside = self.weights(reynolds, alpha)
+        d = self.data[column]
+        value = (1 - tr)*((1 - ta)*d[i0, j0] + ta*d[i0, j1]) \
+                + tr*((1 - ta)*d[i1, j0] + ta*d[i1, j1])
+        return np.where(outside, np.nan, value)
+
+    def flags(self, reynolds, alpha):
+        """
+        return boolean arrays (outside, unconverged) for the given points
+        """
+        (i0, i1, _, _), (j0, j1, _, _), outside = self.weights(reynolds, alpha)
+        d = np.isnan(self.data['CD'])
+        unconverged = d[i0, j0] | d[i0, j1] | d[i1, j0] | d[i1, j1]
+        return outside, unconverged & ~outside
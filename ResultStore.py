@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class ResultStore:
+    """
+    persistent store of analysed configurations
+
+    Results are keyed by a hash of everything that determines them (see
+    ResultStore.key): the geometry text str(avl), the run-case constraints,
+    Mach and Reynolds numbers, the solver and the compute_* flags. Activate
+    for all Avl objects with
+
+        Avl.result_store = ResultStore("results.sqlite")
+
+    after which Avl.execute looks up every case before running AVL. The
+    parsed outputs are stored, plus the force and moment distribution
+    files if distributions is True.
+
+    Every entry records Avl.parser_version; entries written by another
+    version are ignored and removed when looked up, so a parser change
+    invalidates them. max_entries bounds the file, evicting the least
+    recently used entries first.
+    """
+
+    def __init__(self, file_name="chrysopelea_results.sqlite", max_entries=100000,\
+                 distributions=True):
+        self.file_name = file_name
+        self.max_entries = max_entries
+        self.distributions = distributions
+        self.lock = threading.Lock()
+        self.pid = None
+        self.db = None
+
+    def __repr__(self):
+        return "Result store in {}".format(self.file_name)
+
+    def __len__(self):
+        with self.lock:
+            return self.connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['lock'] = None
+        state['db'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def connection(self):
+        # sqlite connections must not cross a fork, so reconnect per process
+        if self.db is None or self.pid != os.getpid():
+            self.db = sqlite3.connect(self.file_name, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS results "
+                            "(key TEXT PRIMARY KEY, version INTEGER, name TEXT, "
+                            "constraints TEXT, mach REAL, reynolds REAL, results TEXT, "
+                            "force_data TEXT, moment_data TEXT, used REAL)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+            self.pid = os.getpid()
+        return self.db
+
+    @staticmethod
+    def key(avl, constraints):
+        """
+        return the hash identifying a run of avl under constraints
+        """
+        case = sorted((str(c), str(constraints[c])) for c in constraints)
+        identity = (str(avl), case, avl.mach, avl.reynolds, avl.solver,\
+                    avl.compute_stability, avl.compute_force_dist, avl.compute_moment_dist)
+        return hashlib.sha256(repr(identity).encode()).hexdigest()
+
+    def get(self, key, version):
+        """
+        return a dict with the results and distribution texts stored for
+        key, or None
+        """
+        with self.lock:
+            db = self.connection()
+            row = db.execute("SELECT version, results, force_data, moment_data FROM results "
+                             "WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] != version:
+                db.execute("DELETE FROM results WHERE key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+        return {'results': json.loads(row[1]), 'force_data': row[2], 'moment_data': row[3]}
+
+    def put(self, key, version, avl, constraints, results, force_data=None, moment_data=None):
+        if not self.distributions:
+            force_data = None
+            moment_data = None
+        case = json.dumps({str(c): str(constraints[c]) for c in constraints}, sort_keys=True)
+        with self.lock:
+            db = self.connection()
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",\
+                       (key, version, avl.name, case, avl.mach, avl.reynolds,\
+                        json.dumps(results), force_data, moment_data, time.time()))
+            count = db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if count > self.max_entries:
+                db.execute("DELETE FROM results WHERE key IN "
+                           "(SELECT key FROM results ORDER BY used LIMIT ?)",\
+                           (count - self.max_entries,))
+            db.commit()
+
+    def invalidate(self, version=None):
+        """
+        forget every entry not written by the given parser version, or all
+        entries if no version is given
+        """
+        with self.lock:
+            db = self.connection()
+            if version is None:
+                db.execute("DELETE FROM results")
+            else:
+                db.execute("DELETE FROM results WHERE version != ?", (version,))
+            db.commit()
+
+    def to_dataframe(self, name=None):
+        """
+        return every stored entry (or those of the configuration called
+        name) as a DataFrame with one row per entry: name, constraints,
+        mach, reynolds and version, then one column per output variable
+        """
+        import pandas as pd
+        query = "SELECT name, constraints, mach, reynolds, version, results FROM results"
+        with self.lock:
+            if name is None:
+                rows = self.connection().execute(query).fetchall()
+            else:
+                rows = self.connection().execute(query + " WHERE name = ?", (name,)).fetchall()
+        columns = ['name', 'constraints', 'mach', 'reynolds', 'version']
+        records = []
+        for row in rows:
+            record = dict(zip(columns, row[:5]))
+            record.update(json.loads(row[5]))
+            records.append(record)
+        return pd.DataFrame(records)
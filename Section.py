@@ -1,7 +1,13 @@
 import subprocess
 import io
-import pandas as pd
+import os
+import hashlib
+import math
+import numpy as np
 from Control import *
+from Workspace import *
+from PolarCache import *
+from PolarTable import *
 
 class Section:
     polar = None
@@ -9,14 +15,29 @@ class Section:
     reynolds = None
     xfoil_cmd = "xfoil"
     number_iterations = 1000
+    mach = 0
+    polar_cache = None
+    polar_table = None
+    alpha = None
+    stats = None
+    warm_start = False
+    march_schedule = ((2, 200), (1, 500), (0.5, 1000))
+    converged = None
+    attempts = 0
+    failure = None
+    # coordinate file digests by path, modification time and size
+    airfoil_digests = {}
 
     def __init__(self, coord_file, position=(0,0,0), chord=1,\
                  incidence=0, sspace=1, nspan=10):
         self.controls = []
         self.coord_file = coord_file
-        self.position = position
-        self.chord = chord
-        self.incidence = incidence
+        # a new section has no surface to tell, so skip the setters
+        self._position = position
+        self._chord = chord
+        self._incidence = incidence
+        self.sspace = sspace
+        self.nspan = nspan
 
     @classmethod
     def from_text(cls, text):
@@ -24,8 +45,8 @@ class Section:
         entries = [e for e in entries if e != '']
         coord = (float(entries[0]), float(entries[1]), float(entries[2]))
         chord = float(entries[3])
-        incidence = int(entries[4])
-        sspace = int(entries[5]); nspan = int(entries[6])
+        incidence = float(entries[4])
+        nspan = int(entries[5]); sspace = float(entries[6])
         identity = cls.identity_from_text(text)
         section = cls(identity, position=coord, chord=chord, incidence=incidence, \
                       sspace=sspace, nspan=nspan)
@@ -42,6 +63,43 @@ class Section:
     def add_Control(self, control):
         control.parent = self
         self.controls.append(control)
+        self.invalidate()
+
+    # the geometry fields tell the surface to drop its derived geometry
+
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position = value
+        if not (self.parent is None):
+            self.parent.invalidate()
+
+    @property
+    def chord(self):
+        return self._chord
+
+    @chord.setter
+    def chord(self, value):
+        self._chord = value
+        if not (self.parent is None):
+            self.parent.invalidate()
+
+    @property
+    def incidence(self):
+        return self._incidence
+
+    @incidence.setter
+    def incidence(self, value):
+        self._incidence = value
+        if not (self.parent is None):
+            self.parent.invalidate()
+
+    def invalidate(self):
+        if not (self.parent is None):
+            self.parent.invalidate()
 
     def add_Control_from_text(self, text):
         con = text.split('CONTROL')
@@ -49,24 +107,62 @@ class Section:
             con = Control.from_text(con[1])
             self.add_Control(con)
 
+    def recorder(self):
+        """
+        return the Stats this section reports to: its own stats if set,
+        otherwise those of the Avl object it belongs to
+        """
+        if not (self.stats is None):
+            return self.stats
+        if not (self.parent is None or self.parent.parent is None):
+            return self.parent.parent.stats
+        return no_stats
+
+    def tabulated(self):
+        """
+        True if coefficients come from polar_table rather than XFOIL
+        """
+        return not (self.polar_table is None or self.alpha is None)
+
+    def point(self):
+        """
+        return the polar row of the current attitude
+        """
+        if len(self.polar) == 0:
+            if self.failure:
+                raise Exception("XFOIL not converged for {}: {}.".format(self.attitude,\
+                                                                        self.failure))
+            raise Exception("XFOIL not converged for {}.".format(self.attitude))
+        return self.polar.iloc[-1]
+
     def drag_coef(self):
-        return self.polar.iloc[0]['CD']
+        if self.tabulated():
+            return float(self.polar_table.interpolate('CD', self.reynolds, self.alpha))
+        return self.point()['CD']
 
     def lift_coef(self):
-        return self.polar.iloc[0]['CL']
+        if self.tabulated():
+            return float(self.polar_table.interpolate('CL', self.reynolds, self.alpha))
+        return self.point()['CL']
 
     def set_attitude(self, alpha=None, lift_coef=0):
         if not (alpha is None):
-            self.attitude = "alfa {}".format(alpha + self.incidence)
+            self.alpha = alpha + self.incidence
+            self.attitude = "alfa {}".format(self.alpha)
         else:
+            self.alpha = None
             self.attitude = "CL {}".format(lift_coef)
 
     def set_reynolds(self, value=None):
         if value:
             self.reynolds = value
         else:
-            self.reynolds = self.parent.parent.reynolds*self.chord / \
-                            self.parent.parent.reference_chord()
+            avl = self.parent.parent
+            self.reynolds = avl.reynolds*self.chord/avl.reference_chord()
+            if avl.reynolds_tolerance:
+                # snap onto a logarithmic grid so nearby values give equal jobs
+                step = math.log(1 + avl.reynolds_tolerance)
+                self.reynolds = math.exp(round(math.log(self.reynolds)/step)*step)
         self.reynolds = int(self.reynolds)
 
     def load_cmd(self):
@@ -78,39 +174,325 @@ class Section:
     def misc_cmds(self):
         return ""
 
-    def execute(self):
-        input = open("chrysopelea.xin",'w')
-        if self.reynolds:
-            reynolds_cmd = "\nvisc {}".format(self.reynolds)
+    def airfoil_identity(self):
+        """
+        string identifying the airfoil shape, used for caching. A coordinate
+        file is hashed again only after it has changed.
+        """
+        path = os.path.abspath(self.coord_file)
+        info = os.stat(path)
+        stamp = (path, info.st_mtime_ns, info.st_size)
+        digest = self.airfoil_digests.get(stamp)
+        if digest is None:
+            f = open(path, 'rb')
+            digest = hashlib.sha256(f.read()).hexdigest()
+            f.close()
+            self.airfoil_digests[stamp] = digest
+        return "file {}".format(digest)
+
+    def camber_slope(self, x):
+        """
+        return the slope dz/dx of the mean camber line at the chord
+        fractions x, from the coordinate file
+        """
+        coords = np.loadtxt(self.coord_file, skiprows=1)
+        le = coords[:, 0].argmin()
+        upper = coords[le::-1]
+        lower = coords[le:]
+        grid = np.linspace(0, 1, 201)
+        camber = 0.5*(np.interp(grid, upper[:, 0], upper[:, 1]) \
+                      + np.interp(grid, lower[:, 0], lower[:, 1]))
+        return np.interp(x, grid, np.gradient(camber, grid))
+
+    def job_key(self):
+        """
+        everything that determines the result of execute
+        """
+        key = (self.airfoil_identity(), self.reynolds, self.mach, self.attitude,\
+               self.number_iterations, self.misc_cmds())
+        if self.warm_start:
+            key += (self.march_schedule,)
+        return key
+
+    @staticmethod
+    def march(cmd, values, step=None):
+        """
+        return the OPER commands (cmd is "alfa {}" or "CL {}") solving for
+        each of values in turn, starting from zero. With a step (in degrees)
+        intermediate points are inserted so that each solution starts from a
+        converged neighbour at most step away.
+        """
+        if cmd.startswith("CL") and step:
+            # about the lift coefficient gained per degree
+            step = 0.1*step
+        points = []
+        start = 0
+        for value in values:
+            if step:
+                n = math.ceil(abs(value - start)/step - 1e-9)
+                points += [start + (value - start)*k/n for k in range(1, n)]
+            points.append(value)
+            start = value
+        return [cmd.format(p) for p in points]
+
+    @staticmethod
+    def matching(polar, column, values):
+        """
+        return the last polar row solved for each of values, in their order.
+        XFOIL prints the values rounded; unconverged ones have no row.
+        """
+        import pandas as pd
+        rows = [polar[abs(polar[column] - v) < 1e-3].tail(1) for v in values]
+        return pd.concat([polar.iloc[:0]] + rows, ignore_index=True)
+
+    def target(self):
+        """
+        return the OPER command, polar column and value of the current attitude
+        """
+        cmd, value = self.attitude.split()
+        if cmd == "alfa":
+            return "alfa {}", 'alpha', float(value)
+        return "CL {}", 'CL', float(value)
+
+    def solve(self):
+        """
+        run XFOIL for the current attitude and return the polar text.
+
+        The first attempt is a single cold solution at the target, which is
+        all there is without warm_start. With warm_start, a target that did
+        not converge is retried with each attempt of march_schedule in turn,
+        a (step in degrees, iteration limit) pair that marches from zero to
+        the target in one XFOIL session, until it converges; there is no
+        retry after a run stopped by the Workspace watchdog. The number of
+        attempts made is left in attempts.
+        """
+        for operations, iterations in self.solve_attempts():
+            text = self.xfoil(operations, self.reynolds, iterations)
+            if self.solved(text):
+                break
+        return text
+
+    async def solve_async(self):
+        """
+        coroutine version of solve
+        """
+        for operations, iterations in self.solve_attempts():
+            text = await self.xfoil_async(operations, self.reynolds, iterations)
+            if self.solved(text):
+                break
+        return text
+
+    def solve_attempts(self):
+        """
+        yield the OPER commands and iteration limit of each XFOIL run of
+        solve, counting attempts and retries
+        """
+        self.attempts = 1
+        yield self.attitude, None
+        if not (self.warm_start and self.reynolds):
+            return
+        cmd, column, value = self.target()
+        for step, iterations in self.march_schedule:
+            self.attempts += 1
+            self.recorder().count('xfoil_retries')
+            yield '\n'.join(["init"] + self.march(cmd, [value], step)), iterations
+
+    def solved(self, text):
+        """
+        return True if solve is done after the XFOIL run that gave text:
+        the target converged, the watchdog stopped XFOIL, or there is
+        nothing to retry
+        """
+        if self.failure or not (self.warm_start and self.reynolds):
+            return True
+        cmd, column, value = self.target()
+        return len(self.matching(self.read_polar(text), column, [value])) > 0
+
+    def xfoil_text(self, ws, operations, reynolds=None, iterations=None):
+        """
+        return the XFOIL script that runs the given OPER commands (one per
+        line) and accumulates the polar in ws, allowing iterations (default
+        number_iterations) per point
+        """
+        if iterations is None:
+            iterations = self.number_iterations
+        if reynolds:
+            conditions = "\nvisc {}".format(reynolds)
         else:
-            reynolds_cmd = ""
-        xfoil_cmds = """
+            conditions = ""
+        if self.mach:
+            conditions += "\nmach {}".format(self.mach)
+        return """
 {}
 {}
 oper{}
 iter {}
 pacc
-chrysopelea.xpolar
+{}
 
 {}
 
 quit
-""".format(self.load_cmd(), self.misc_cmds(), reynolds_cmd, self.number_iterations,\
-           self.attitude)
-        input.write(xfoil_cmds)
-        input.close()
-        cmd = "{} < chrysopelea.xin > chrysopelea.xout".format(self.xfoil_cmd)
-        subprocess.run(cmd, shell=True)
-
-        polar = open("chrysopelea.xpolar")
-        text = polar.read()
-        polar.close()
+""".format(self.load_cmd(), self.misc_cmds(), conditions, iterations,\
+           ws.path("chrysopelea.xpolar"), operations)
+
+    def xfoil(self, operations, reynolds=None, iterations=None):
+        """
+        run XFOIL once with the given OPER commands (one per line) and return
+        the text of the accumulated polar file. If the Workspace watchdog
+        stopped XFOIL, failure says why and the text holds the points solved
+        until then.
+        """
+        stats = self.recorder()
+        with Workspace(stats=stats) as ws:
+            with stats.phase('xfoil'):
+                ws.run(self.xfoil_cmd, self.xfoil_text(ws, operations, reynolds, iterations))
+            stats.count('xfoil_runs')
+            return self.polar_text(ws)
+
+    async def xfoil_async(self, operations, reynolds=None, iterations=None):
+        """
+        coroutine version of xfoil
+        """
+        stats = self.recorder()
+        with Workspace(stats=stats) as ws:
+            with stats.phase('xfoil'):
+                await ws.run_async(self.xfoil_cmd,\
+                                   self.xfoil_text(ws, operations, reynolds, iterations))
+            stats.count('xfoil_runs')
+            return self.polar_text(ws)
+
+    def polar_text(self, ws):
+        self.failure = ws.failure
+        if self.failure and not os.path.exists(ws.path("chrysopelea.xpolar")):
+            return ""
+        return ws.read("chrysopelea.xpolar")
+
+    def run(self, operations, reynolds=None, iterations=None):
+        """
+        run XFOIL once with the given OPER commands (one per line) and return
+        the accumulated polar as a DataFrame. Points that do not converge are
+        missing from the polar.
+        """
+        text = self.xfoil(operations, reynolds, iterations)
+        with self.recorder().phase('polar_parse'):
+            return self.read_polar(text)
+
+    @staticmethod
+    def read_polar(text):
+        import pandas as pd
+        if text.count('\n') < 12:
+            # XFOIL was stopped before it wrote the polar header
+            return pd.DataFrame(columns=['alpha', 'CL', 'CD', 'CDp', 'CM', 'Top_Xtr', 'Bot_Xtr'],\
+                                dtype=float)
         csv = io.StringIO(re.sub(' +', ',', text))
         polar = pd.read_csv(csv,skiprows = list(range(10)) + [11])
         polar.dropna(axis=1,inplace=True)
+        return polar
+
+    def read_point(self, text):
+        """
+        parse the polar text of the current attitude and set converged
+        """
+        with self.recorder().phase('polar_parse'):
+            polar = self.read_polar(text)
+            if self.warm_start and self.reynolds:
+                cmd, column, value = self.target()
+                polar = self.matching(polar, column, [value])
         self.polar = polar
-        # prevents appending to the same file
-        subprocess.run("rm chrysopelea.xpolar", shell=True)
+        self.converged = len(polar) > 0
+        if not self.converged:
+            self.recorder().count('xfoil_unconverged')
+
+    def execute(self):
+        """
+        solve the current attitude with XFOIL. converged tells whether it
+        did; if not, drag_coef and lift_coef raise.
+        """
+        # nothing of a previous run may survive a cache hit
+        self.failure = None
+        self.attempts = 0
+        if self.tabulated():
+            return
+        if self.polar_cache is None:
+            text = self.solve()
+        else:
+            text = self.polar_cache.polar(self)
+        self.read_point(text)
+
+    async def execute_async(self):
+        """
+        coroutine version of execute, for running many sections concurrently
+        """
+        self.failure = None
+        self.attempts = 0
+        if self.tabulated():
+            return
+        if self.polar_cache is None:
+            text = await self.solve_async()
+        else:
+            text = await self.polar_cache.polar_async(self)
+        self.read_point(text)
+
+    def polar_sweep(self, alphas=None, cls=None, reynolds=None, status=False):
+        """
+        compute a whole polar in a single XFOIL run.
+
+        Give either airfoil angles of attack (alphas, degrees) or lift
+        coefficients (cls). reynolds defaults to the section's Reynolds
+        number; inviscid if neither is set. Points are solved outward from
+        the one nearest zero so each viscous solution starts from a converged
+        neighbour, and the boundary layer is reinitialized before marching
+        in the negative direction. With warm_start, points that did not
+        converge are retried with each attempt of march_schedule, marching
+        to them in steps as in solve, all of them in one more XFOIL run per
+        attempt.
+
+        Returns a DataFrame sorted by alpha with columns alpha, CL, CD, CDp,
+        CM, Top_Xtr and Bot_Xtr; points that did not converge are omitted,
+        or with status True kept with NaN coefficients and a converged column
+        telling them apart.
+        """
+        import pandas as pd
+        if reynolds is None:
+            reynolds = self.reynolds
+        if alphas is None:
+            cmd, column = "CL {}", 'CL'
+            values = cls
+        else:
+            cmd, column = "alfa {}", 'alpha'
+            values = alphas
+        positive = sorted([v for v in values if v >= 0])
+        negative = sorted([v for v in values if v < 0], reverse=True)
+        schedule = ((None, None),)
+        if self.warm_start and reynolds:
+            schedule += tuple(self.march_schedule)
+        step, iterations = schedule[0]
+        operations = self.march(cmd, positive, step)
+        if negative:
+            operations.append("init")
+            operations += self.march(cmd, negative, step)
+        polar = self.matching(self.run('\n'.join(operations), reynolds, iterations),\
+                              column, values)
+        for step, iterations in schedule[1:]:
+            missing = [v for v in values if not (abs(polar[column] - v) < 1e-3).any()]
+            if not missing or self.failure:
+                break
+            self.recorder().count('xfoil_retries', len(missing))
+            operations = []
+            for v in missing:
+                operations += ["init"] + self.march(cmd, [v], step)
+            retried = self.matching(self.run('\n'.join(operations), reynolds, iterations),\
+                                    column, missing)
+            polar = pd.concat([polar, retried], ignore_index=True)
+        if status:
+            polar['converged'] = True
+            missing = [v for v in values if not (abs(polar[column] - v) < 1e-3).any()]
+            polar = pd.concat([polar, pd.DataFrame({column: missing, 'converged': False})],\
+                              ignore_index=True)
+        polar.sort_values(by='alpha', inplace=True)
+        polar.reset_index(drop=True, inplace=True)
+        return polar
 
     def __str__(self):
         # Trailing space at end of {} line is necessary!
@@ -126,17 +508,18 @@ SECTION
         return s
 
     def translate(self, coord):
-        self.position = tuple([self.position[i] + coord[i] for i in range(3)])
+        position = self._position
+        self.position = (position[0] + coord[0], position[1] + coord[1], position[2] + coord[2])
 
 class Naca(Section):
     def __init__(self, desig, position=(0,0,0), chord=1, incidence=0, sspace=1, nspan=10):
         self.controls = []
         self.desig = desig
-        self.position = position
-        self.chord = chord
+        self._position = position
+        self._chord = chord
         self.sspace = sspace
         self.nspan = nspan
-        self.incidence = incidence
+        self._incidence = incidence
 
     @classmethod
     def identity_from_text(cls, text):
@@ -147,6 +530,21 @@ class Naca(Section):
     def load_cmd(self):
         return "naca {}".format(self.desig)
 
+    def airfoil_identity(self):
+        return "naca {}".format(self.desig)
+
+    def camber_slope(self, x):
+        """
+        analytic camber line slope of 4-digit sections; other designations
+        are treated as uncambered
+        """
+        x = np.asarray(x, dtype=float)
+        if len(self.desig) != 4 or not self.desig.isdigit() or "0" in self.desig[:2]:
+            return np.zeros_like(x)
+        m = int(self.desig[0])/100
+        p = int(self.desig[1])/10
+        return np.where(x < p, 2*m/p**2*(p - x), 2*m/(1 - p)**2*(p - x))
+
     def load_text(self):
         return "NACA\n{}".format(self.desig)
 
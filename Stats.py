@@ -0,0 +1,135 @@
+import threading
+import time
+
+class Stats:
+    """
+    wall-clock timings and counters collected while executing
+
+    Every Avl object owns one in its stats attribute, which its sections
+    and the copies made by sweep and execute_cases report to as well.
+    Timed phases may nest (e.g. 'xfoil' runs inside 'viscous'):
+
+        geometry     writing the AVL geometry and command script
+        avl          the AVL process
+        parse        parsing AVL output and distribution files
+        lattice      building the lattice of the VLM solver
+        vlm          VLM solutions
+        viscous      the whole XFOIL pass of Avl.execute
+        xfoil        XFOIL processes
+        polar_parse  parsing XFOIL polars
+        force_dist, moment_dist
+                     building strip force and bending moment tables
+
+    Counters include processes, avl_runs, xfoil_runs, bytes_written,
+    bytes_read, polar_cache_hits, polar_cache_misses, result_store_hits,
+    result_store_misses, shared_xfoil_jobs, xfoil_retries (points solved
+    again by Section.warm_start), xfoil_unconverged and timeouts (runs
+    killed by the Workspace watchdog).
+
+    Set enabled to False to turn collection off; phases then cost a single
+    attribute lookup. If callback is given it is called as
+    callback(kind, name, value) for every event, with kind 'time' (value in
+    seconds) or 'count', e.g. to forward the data to a metrics system.
+    Objects sent to worker processes collect their own, separate stats.
+    """
+
+    def __init__(self, callback=None, enabled=True):
+        self.callback = callback
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        return "Chrysopelea stats with {} phases and {} counters".format(len(self.seconds),\
+                                                                        len(self.counters))
+
+    def __str__(self):
+        lines = ["{:<14}{:>8}{:>14}".format("phase", "calls", "seconds")]
+        for name in self.seconds:
+            lines.append("{:<14}{:>8}{:>14.6f}".format(name, self.calls[name], self.seconds[name]))
+        for name in self.counters:
+            lines.append("{:<22}{:>14}".format(name, self.counters[name]))
+        return '\n'.join(lines)
+
+    def __deepcopy__(self, memo):
+        # copies of an aircraft report to the same stats
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['lock'] = None
+        state['callback'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.seconds = {}
+            self.calls = {}
+            self.counters = {}
+
+    def phase(self, name):
+        """
+        return a context manager timing the enclosed block as phase name
+        """
+        if self.enabled:
+            return Phase(self, name)
+        return idle
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.seconds[name] = self.seconds.get(name, 0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.callback is not None:
+            self.callback('time', name, seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        if self.callback is not None:
+            self.callback('count', name, n)
+
+    def summary(self):
+        """
+        return a dict of the collected data: per phase its number of calls
+        and total seconds, and every counter
+        """
+        with self.lock:
+            data = {name: {'calls': self.calls[name], 'seconds': self.seconds[name]}\
+                    for name in self.seconds}
+            data.update(self.counters)
+        return data
+
+class Phase:
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+
+class Idle:
+    """
+    stand-in for Phase when stats are disabled
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+idle = Idle()
+no_stats = Stats(enabled=False)
@@ -1,19 +1,91 @@
 from Section import *
+from Planform import *
 import math
+import numpy as np
 
 class Surface:
-    yduplicate = 0
+    """
+    lifting surface made of sections
+
+    Derived geometry (see geometry) is computed from the Planform array
+    view of the sections once and kept until the surface changes:
+    assigning sections, yduplicate or a section's position, chord or
+    incidence, and add_Section and scale, clear it. Call invalidate after
+    changing a position in place or editing the sections list directly.
+    """
+    _yduplicate = 0
     parent = None
+    geometry_cache = None
+    geometry_names = ('area', 'span', 'mean_chord', 'mean_aerodynamic_chord', 'aspect_ratio')
 
     def __init__(self, name, cspace=1, nchord=5):
-        self.sections = []
+        self._sections = []
         self.name = name
-        self.cspace = 1
-        self.nchord = 5
+        self.cspace = cspace
+        self.nchord = nchord
 
     def add_Section(self, sec):
         sec.parent=self
-        self.sections.append(sec)
+        self._sections.append(sec)
+        if not (self.geometry_cache is None and self.parent is None):
+            self.invalidate()
+
+    @property
+    def sections(self):
+        return self._sections
+
+    @sections.setter
+    def sections(self, value):
+        self._sections = value
+        self.invalidate()
+
+    @property
+    def yduplicate(self):
+        return self._yduplicate
+
+    @yduplicate.setter
+    def yduplicate(self, value):
+        self._yduplicate = value
+        self.invalidate()
+
+    def invalidate(self):
+        # nothing to forget while the surface is being built
+        if not (self.geometry_cache is None):
+            self.geometry_cache = None
+        if not (self.parent is None):
+            self.parent.invalidate()
+
+    def cached(self, name, compute):
+        """
+        return the derived geometry value name, calling compute only once
+        after every change
+        """
+        if self.geometry_cache is None:
+            self.geometry_cache = {}
+        if name not in self.geometry_cache:
+            self.geometry_cache[name] = compute()
+        return self.geometry_cache[name]
+
+    def planform(self):
+        """
+        return the Planform array view of the sections, kept until the
+        surface changes
+        """
+        return self.cached('planform', lambda: Planform.from_surface(self))
+
+    def geometry(self):
+        """
+        return the derived geometry in the order of geometry_names as an
+        array; values undefined for this surface (e.g. the mean chord of a
+        surface without span) are NaN
+        """
+        values = np.empty(len(self.geometry_names))
+        for n, name in enumerate(self.geometry_names):
+            try:
+                values[n] = getattr(self, name)()
+            except ZeroDivisionError:
+                values[n] = math.nan
+        return values
 
     def __repr__(self):
         return 'AVL surface with name "{}"'.format(self.name)
@@ -41,43 +113,28 @@ SURFACE
         """
         return the planform area
         """
-        a = 0
-        for n in range(1,len(self.sections)):
-            a += 0.5*abs(self.sections[n].position[1] - self.sections[n-1].position[1]) \
-                    *(self.sections[n].chord + self.sections[n-1].chord)
-        if self.yduplicate is None:
-            return a
-        else:
-            return a*2
+        return self.cached('area', self.compute_area)
+
+    def compute_area(self):
+        return float(self.planform().area())
 
     def span(self):
-        a = 0
-        pos = [s.position[1] for s in self.sections]
-        if self.yduplicate is None:
-            b = abs(max(pos) - min(pos))
-        else:
-            b = 2*max([abs(p-self.yduplicate) for p in pos])
-        return b
+        return self.cached('span', self.compute_span)
+
+    def compute_span(self):
+        return float(self.planform().span())
 
     def mean_chord(self):
-        return self.area()/self.span()
+        return self.cached('mean_chord', lambda: self.area()/self.span())
 
     def mean_aerodynamic_chord(self):
-        def integrated_sq_chord(sect0, sect1):
-            if (sect0.chord == sect1.chord):
-                return sect0.chord**2 * self.dist(sect0, sect1)
-            return (sect0.chord**3 - sect1.chord**3)/3 \
-                   * self.dist(sect0, sect1)/(sect0.chord - sect1.chord)
-        total = 0
-        for iSect in range(1, len(self.sections)):
-            total += integrated_sq_chord(self.sections[iSect], self.sections[iSect - 1])
-        if self.yduplicate is None:
-            return total/self.area()
-        else:
-            return total*2/self.area()
+        return self.cached('mean_aerodynamic_chord', self.compute_mean_aerodynamic_chord)
+
+    def compute_mean_aerodynamic_chord(self):
+        return float(self.planform().mean_aerodynamic_chord())
 
     def aspect_ratio(self):
-        return self.span()/self.mean_chord()
+        return self.cached('aspect_ratio', lambda: self.span()/self.mean_chord())
 
     @staticmethod
     def dist(sec0, sec1):
@@ -85,19 +142,29 @@ SURFACE
         d2 = sec0.position[2] - sec1.position[2]
         return math.sqrt(d1**2 + d2**2)
 
+    def section_drag_coefs(self):
+        """
+        return the 2D drag coefficient of every section as an array.
+        Sections with a polar table are interpolated in one call per table.
+        """
+        cd = np.empty(len(self.sections))
+        tables = {}
+        for n, sec in enumerate(self.sections):
+            if sec.tabulated():
+                tables.setdefault(id(sec.polar_table), []).append(n)
+            else:
+                cd[n] = sec.drag_coef()
+        for indices in tables.values():
+            secs = [self.sections[n] for n in indices]
+            cd[indices] = secs[0].polar_table.interpolate('CD', [sec.reynolds for sec in secs],\
+                                                          [sec.alpha for sec in secs])
+        return cd
+
     def drag_coef_2D(self):
         if self.parent.reynolds is None:
             return 0
         else:
-            c = 0
-            for n in range(1,len(self.sections)):
-                c0 = self.sections[n].drag_coef()*self.sections[n].chord
-                c1 = self.sections[n-1].drag_coef()*self.sections[n].chord
-                chordwise = 0.5*(c0 + c1)
-                c += chordwise*self.dist(self.sections[n], self.sections[n - 1])
-            if not (self.yduplicate is None):
-                c *= 2
-            return c/self.area()
+            return float(self.planform().drag_coef(self.section_drag_coefs()))
 
     @classmethod
     def from_text(cls, text):
@@ -123,6 +190,7 @@ SURFACE
         for s in self.sections:
             s.position = [x*factor for x in s.position]
             s.chord *= factor
+        self.invalidate()
 
     def set_attitude(self, alpha):
         for sec in self.sections:
@@ -0,0 +1,303 @@
+import math
+import numpy as np
+
+class Vlm:
+    """
+    in-process vortex-lattice solver for an Avl configuration
+
+    The lattice is laid out the way AVL lays it out: every surface is split
+    into strips between its sections (nspan and sspace of the inboard
+    section of each interval) and every strip into nchord chordwise panels
+    (cspace of the surface). Each panel carries a horseshoe vortex with its
+    bound leg on the quarter-panel line and legs trailing along x, and has
+    its control point on the three-quarter-panel line. Incidence and camber
+    line slope tilt the control point normals, as in AVL, rather than the
+    geometry. Surfaces with a yduplicate get a mirror image with its own
+    unknowns, so sideslip is handled.
+
+    The influence matrix depends on the geometry only. It is solved once,
+    against the three freestream components, when the object is built;
+    every later alpha and beta costs only matrix-vector products.
+
+    Forces are integrated at the bound vortex midpoints (CLtot, CDind,
+    moments) and in the Trefftz plane (CLff, CDff, CYff, e). Controls,
+    rotation rates, Mach number effects and symmetry planes (Avl.sym) are
+    not modelled.
+    """
+    output_names = ('Alpha', 'Beta', 'Mach', 'Sref', 'Cref', 'Bref', 'CXtot', 'CYtot',\
+                    'CZtot', 'Cltot', 'Cmtot', 'Cntot', 'CLtot', 'CDtot', 'CDvis', 'CDind',\
+                    'CLff', 'CDff', 'CYff', 'e')
+
+    def __init__(self, avl):
+        if avl.sym[0] or avl.sym[1]:
+            raise Exception("Symmetry planes are not supported by the VLM solver.")
+        if avl.mach:
+            raise Exception("Compressibility is not supported by the VLM solver.")
+        self.sref = avl.area()
+        self.cref = avl.reference_chord()
+        self.bref = avl.span()
+        self.origin = np.array(avl.origin, dtype=float)
+        panels = []
+        strips = 0
+        for surf_name in avl.surfaces.keys():
+            for lattice in self.surface_lattices(avl.surfaces[surf_name]):
+                lattice['strip'] = lattice['strip'] + strips
+                strips = lattice['strip'].max() + 1
+                panels.append(lattice)
+        for key in ('a', 'b', 'control', 'normal', 'strip'):
+            setattr(self, key, np.concatenate([p[key] for p in panels]))
+        self.midpoint = 0.5*(self.a + self.b)
+        self.bound = self.b - self.a
+
+        # circulation per unit freestream component: gamma = g @ v_inf
+        aic = np.einsum('ijk,ik->ij', self.induced(self.control), self.normal)
+        self.g = np.linalg.solve(aic, -self.normal)
+        # velocity at the bound vortex midpoints per unit circulation
+        self.w = self.induced(self.midpoint)
+
+        # Trefftz plane: strip edges and the wake velocity they induce
+        first = np.unique(self.strip, return_index=True)[1]
+        self.edge_a = self.a[first][:, 1:]
+        self.edge_b = self.b[first][:, 1:]
+        self.trefftz = self.wake_velocity(0.5*(self.edge_a + self.edge_b))
+
+    def __repr__(self):
+        return "Vortex lattice with {} panels in {} strips".format(len(self.a),\
+                                                                 len(self.edge_a))
+
+    def __deepcopy__(self, memo):
+        # nothing changes after construction, so copies can share it
+        return self
+
+    @staticmethod
+    def spacing(n, sspace):
+        """
+        return n + 1 fractions from 0 to 1 distributed like AVL's spacing
+        parameter: 0 equal, 1 cosine, 2 sine, 3 equal, negative values
+        reversing the sine, fractional values blending neighbours
+        """
+        t = np.linspace(0, 1, n + 1)
+        s = min(abs(sspace), 3)
+        equal = t
+        cosine = 0.5*(1 - np.cos(math.pi*t))
+        if sspace >= 0:
+            sine = np.sin(0.5*math.pi*t)
+        else:
+            sine = 1 - np.cos(0.5*math.pi*t)
+        if s <= 1:
+            return (1 - s)*equal + s*cosine
+        if s <= 2:
+            return (2 - s)*cosine + (s - 1)*sine
+        return (3 - s)*sine + (s - 2)*equal
+
+    def surface_lattices(self, surf):
+        """
+        return the panels of surf, and of its mirror image if it has one,
+        as dicts of arrays
+        """
+        x_hat = np.array([1., 0, 0])
+        xi = self.spacing(surf.nchord, surf.cspace)
+        xv = xi[:-1] + 0.25*np.diff(xi)
+        xc = xi[:-1] + 0.75*np.diff(xi)
+        a = []; b = []; control = []; normal = []; strip = []
+        n_strip = 0
+        for sec0, sec1 in zip(surf.sections[:-1], surf.sections[1:]):
+            le0 = np.array(sec0.position, dtype=float)
+            le1 = np.array(sec1.position, dtype=float)
+            span = le1 - le0
+            span[0] = 0
+            if not np.any(span):
+                continue
+            span /= np.linalg.norm(span)
+            slope0 = sec0.camber_slope(xc)
+            slope1 = sec1.camber_slope(xc)
+            f = self.spacing(sec0.nspan, sec0.sspace)
+            for f0, f1 in zip(f[:-1], f[1:]):
+                fm = 0.5*(f0 + f1)
+                p0 = le0 + f0*(le1 - le0)
+                p1 = le0 + f1*(le1 - le0)
+                pm = le0 + fm*(le1 - le0)
+                c0 = sec0.chord + f0*(sec1.chord - sec0.chord)
+                c1 = sec0.chord + f1*(sec1.chord - sec0.chord)
+                cm = sec0.chord + fm*(sec1.chord - sec0.chord)
+                incidence = math.radians(sec0.incidence + fm*(sec1.incidence - sec0.incidence))
+                theta = incidence - np.arctan((1 - fm)*slope0 + fm*slope1)
+                chordwise = np.cos(theta)[:, np.newaxis]*x_hat \
+                            - np.sin(theta)[:, np.newaxis]*np.cross(x_hat, span)
+                n = np.cross(chordwise, span)
+                a.append(p0 + np.outer(xv*c0, x_hat))
+                b.append(p1 + np.outer(xv*c1, x_hat))
+                control.append(pm + np.outer(xc*cm, x_hat))
+                normal.append(n/np.linalg.norm(n, axis=1)[:, np.newaxis])
+                strip.append(np.full(len(xv), n_strip))
+                n_strip += 1
+        lattice = {'a': np.concatenate(a), 'b': np.concatenate(b),\
+                   'control': np.concatenate(control), 'normal': np.concatenate(normal),\
+                   'strip': np.concatenate(strip)}
+        lattices = [lattice]
+        ys = [sec.position[1] for sec in surf.sections]
+        if not (surf.yduplicate is None) and max(abs(y - surf.yduplicate) for y in ys) > 0:
+            def mirror(points):
+                points = points.copy()
+                points[:, 1] = 2*surf.yduplicate - points[:, 1]
+                return points
+            normal = lattice['normal'].copy()
+            normal[:, 1] *= -1
+            # swap the bound vortex ends so both halves run in the same sense
+            lattices.append({'a': mirror(lattice['b']), 'b': mirror(lattice['a']),\
+                             'control': mirror(lattice['control']), 'normal': normal,\
+                             'strip': lattice['strip']})
+        return lattices
+
+    def induced(self, points):
+        """
+        return the velocity induced at each point by each horseshoe vortex
+        of unit circulation, shape (points, vortices, 3)
+        """
+        x_hat = np.array([1., 0, 0])
+        r1 = points[:, np.newaxis, :] - self.a[np.newaxis, :, :]
+        r2 = points[:, np.newaxis, :] - self.b[np.newaxis, :, :]
+        return self.segment(r1, r2, self.b - self.a) \
+               + self.trailing(r2, x_hat) - self.trailing(r1, x_hat)
+
+    @staticmethod
+    def segment(r1, r2, r0):
+        cross = np.cross(r1, r2)
+        cross2 = np.sum(cross**2, axis=-1)
+        l1 = np.linalg.norm(r1, axis=-1)
+        l2 = np.linalg.norm(r2, axis=-1)
+        near = cross2 < 1e-12*np.sum(r0**2, axis=-1)
+        cross2 = np.where(near, 1, cross2)
+        factor = np.sum(r0*(r1/np.where(near, 1, l1)[..., np.newaxis] \
+                            - r2/np.where(near, 1, l2)[..., np.newaxis]), axis=-1)
+        factor = np.where(near, 0, factor/(4*math.pi*cross2))
+        return cross*factor[..., np.newaxis]
+
+    @staticmethod
+    def trailing(r, u):
+        """
+        velocity of a semi-infinite filament starting at r = 0 and running
+        along u
+        """
+        cross = np.cross(u, r)
+        cross2 = np.sum(cross**2, axis=-1)
+        length = np.linalg.norm(r, axis=-1)
+        near = cross2 < 1e-12
+        factor = (1 + np.sum(u*r, axis=-1)/np.where(near, 1, length)) \
+                 /(4*math.pi*np.where(near, 1, cross2))
+        return cross*np.where(near, 0, factor)[..., np.newaxis]
+
+    def wake_velocity(self, points):
+        """
+        return the Trefftz plane velocity (y, z) induced at each point by
+        the trailing legs of each strip of unit circulation
+        """
+        velocity = np.zeros((len(points), len(self.edge_a), 2))
+        for edge, sign in ((self.edge_b, 1), (self.edge_a, -1)):
+            d = points[:, np.newaxis, :] - edge[np.newaxis, :, :]
+            d2 = np.sum(d**2, axis=-1)
+            near = d2 < 1e-24
+            factor = np.where(near, 0, sign/(2*math.pi*np.where(near, 1, d2)))
+            velocity[..., 0] -= d[..., 1]*factor
+            velocity[..., 1] += d[..., 0]*factor
+        return velocity
+
+    @staticmethod
+    def freestream(alpha, beta):
+        a = math.radians(alpha)
+        b = math.radians(beta)
+        return np.array([math.cos(a)*math.cos(b), -math.sin(b), math.sin(a)*math.cos(b)])
+
+    def coefficients(self, alpha, beta=0):
+        """
+        return a dict of force and moment coefficients named as in AVL's
+        output, at the given angles in degrees
+        """
+        a = math.radians(alpha)
+        v_inf = self.freestream(alpha, beta)
+        lift = np.array([-math.sin(a), 0, math.cos(a)])
+        side = np.cross(lift, v_inf)
+        gamma = self.g @ v_inf
+
+        velocity = v_inf + np.einsum('ijk,j->ik', self.w, gamma)
+        forces = gamma[:, np.newaxis]*np.cross(velocity, self.bound)
+        force = 2*forces.sum(axis=0)/self.sref
+        moment = 2*np.cross(self.midpoint - self.origin, forces).sum(axis=0)/self.sref
+
+        strip_gamma = np.bincount(self.strip, weights=gamma)
+        wake = np.einsum('ijk,j->ik', self.trefftz, strip_gamma)
+        wake = np.column_stack((np.zeros(len(wake)), wake))
+        edges = np.column_stack((np.zeros(len(wake)), self.edge_b - self.edge_a))
+        far = 2*np.sum(strip_gamma[:, np.newaxis]*np.cross(v_inf + 0.5*wake, edges),\
+                       axis=0)/self.sref
+
+        results = {'Alpha': alpha, 'Beta': beta, 'Mach': 0.0, 'Sref': self.sref,\
+                   'Cref': self.cref, 'Bref': self.bref,\
+                   'CXtot': -force[0], 'CYtot': force[1], 'CZtot': -force[2],\
+                   'Cltot': -moment[0]/self.bref, 'Cmtot': moment[1]/self.cref,\
+                   'Cntot': -moment[2]/self.bref, 'CLtot': force @ lift,\
+                   'CDtot': force @ v_inf, 'CDvis': 0.0, 'CDind': force @ v_inf,\
+                   'CLff': far @ lift, 'CDff': far @ v_inf, 'CYff': far @ side}
+        aspect_ratio = self.bref**2/self.sref
+        if results['CDff'] > 0:
+            results['e'] = results['CLff']**2/(math.pi*aspect_ratio*results['CDff'])
+        else:
+            results['e'] = float('nan')
+        return {name: float(results[name]) for name in self.output_names}
+
+    def trim_alpha(self, lift_coef, beta=0, alpha=0, tolerance=1e-10, iterations=20):
+        """
+        return the angle of attack giving CLtot = lift_coef
+        """
+        step = 1e-3
+        for i in range(iterations):
+            cl = self.coefficients(alpha, beta)['CLtot']
+            if abs(cl - lift_coef) < tolerance:
+                return alpha
+            slope = (self.coefficients(alpha + step, beta)['CLtot'] - cl)/step
+            alpha += (lift_coef - cl)/slope
+        raise Exception("VLM did not reach CL = {}.".format(lift_coef))
+
+    def derivatives(self, alpha, beta):
+        """
+        return stability derivatives per radian by central differences
+        """
+        step = 1e-3
+        results = {}
+        for variable, da, db in (('a', step, 0), ('b', 0, step)):
+            plus = self.coefficients(alpha + da, beta + db)
+            minus = self.coefficients(alpha - da, beta - db)
+            for name in ('CL', 'CY', 'Cl', 'Cm', 'Cn'):
+                results[name + variable] = (plus[name + 'tot'] - minus[name + 'tot'])\
+                                           /math.radians(2*step)
+        return results
+
+    def solve(self, constraints, stability=False):
+        """
+        return the results for a dict of constraints as accepted by Avl.set.
+        alpha may be constrained directly ('a a 5') or through the lift
+        coefficient ('a c 0.5'), beta directly ('b b 2'); rates may only be
+        set to zero.
+        """
+        alpha = 0.0
+        beta = 0.0
+        lift_coef = None
+        for variable in constraints:
+            words = str(constraints[variable]).split()
+            if variable == 'a' and words[0] == 'a':
+                alpha = float(words[1])
+            elif variable == 'a' and words[0] == 'c':
+                lift_coef = float(words[1])
+            elif variable == 'b' and words[0] == 'b':
+                beta = float(words[1])
+            elif variable in ('r', 'p', 'y') and words[0] == variable and float(words[1]) == 0:
+                pass
+            else:
+                raise Exception("Constraint {} {} is not supported by the VLM solver."\
+                                .format(variable, constraints[variable]))
+        if not (lift_coef is None):
+            alpha = self.trim_alpha(lift_coef, beta)
+        results = self.coefficients(alpha, beta)
+        if stability:
+            results.update(self.derivatives(alpha, beta))
+        return results
@@ -0,0 +1,233 @@
+import asyncio
+import os
+import select
+import shlex
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import weakref
+from Stats import *
+
+class RunFailure:
+    """
+    record of a solver run stopped by the Workspace watchdog: reason is
+    'timeout' (wall clock) or 'inactivity' (no output), after seconds
+    """
+
+    def __init__(self, cmd, reason, seconds):
+        self.cmd = cmd
+        self.reason = reason
+        self.seconds = seconds
+
+    def __repr__(self):
+        return "{} stopped by {} after {:.1f} s".format(self.cmd, self.reason, self.seconds)
+
+class Workspace:
+    """
+    private scratch directory for one AVL or XFOIL run
+
+    Every file a run needs (command files, geometry, polars, distributions)
+    is created inside its own temporary directory, so analyses started from
+    the same working directory cannot clobber each other. The directory is
+    removed on exit from the with block, even if the run raised.
+
+    Directories are made in the RAM-backed /dev/shm where it is available,
+    otherwise in the system temporary directory. Set the class attribute
+    root to choose another location.
+
+    Runs started with run_async are limited to max_concurrency solver
+    processes at a time per event loop; set it before the first run.
+
+    Every run is watched: if it takes longer than timeout seconds in all,
+    or prints nothing for inactivity_timeout seconds, its whole process
+    group is killed. The run then returns what was printed so far and
+    failure holds a RunFailure, so callers see an unconverged result
+    rather than an exception. Both limits are off (None) by default. The
+    process group is also killed when the caller is interrupted or, for
+    run_async, cancelled. An AvlSession applies both limits to each case
+    it sends, but raises, as its process cannot be resumed.
+    """
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        root = "/dev/shm"
+    else:
+        root = None
+    max_concurrency = os.cpu_count() or 1
+    semaphores = weakref.WeakKeyDictionary()
+    timeout = None
+    inactivity_timeout = None
+    failure = None
+
+    def __init__(self, root=None, stats=None):
+        if root is None:
+            root = self.root
+        if stats is None:
+            stats = no_stats
+        self.stats = stats
+        self.directory = tempfile.mkdtemp(prefix="chrysopelea-", dir=root)
+
+    def __repr__(self):
+        return "Chrysopelea workspace in {}".format(self.directory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cleanup()
+
+    def path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def read(self, file_name):
+        f = open(self.path(file_name))
+        text = f.read()
+        f.close()
+        self.stats.count('bytes_read', len(text))
+        return text
+
+    def write(self, file_name, text):
+        f = open(self.path(file_name), 'w')
+        f.write(text)
+        f.close()
+        self.stats.count('bytes_written', len(text))
+        return self.path(file_name)
+
+    @staticmethod
+    def command(cmd):
+        """
+        split a command string such as Avl.avl_cmd into an argument list,
+        expanding ~ in each argument
+        """
+        return [os.path.expanduser(arg) for arg in shlex.split(cmd)]
+
+    def wait_time(self, start):
+        """
+        return how long to wait for more output of a run started at start,
+        and the reason to give if none comes; (None, None) if unlimited
+        """
+        waits = []
+        if not (self.timeout is None):
+            waits.append((start + self.timeout - time.monotonic(), 'timeout'))
+        if not (self.inactivity_timeout is None):
+            waits.append((self.inactivity_timeout, 'inactivity'))
+        if not waits:
+            return None, None
+        return min(waits)
+
+    @staticmethod
+    def kill(process):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def stop(self, process, cmd, reason, start):
+        self.kill(process)
+        self.failure = RunFailure(cmd, reason, time.monotonic() - start)
+        self.stats.count('timeouts')
+
+    @staticmethod
+    def feed(pipe, data):
+        try:
+            pipe.write(data)
+            pipe.close()
+        except OSError:
+            # the solver exited or was killed before reading all its input
+            pass
+
+    def run(self, cmd, input_text):
+        """
+        run cmd in this workspace without a shell, feeding input_text to its
+        stdin, and return its stdout
+        """
+        self.stats.count('processes')
+        self.stats.count('bytes_written', len(input_text))
+        self.failure = None
+        start = time.monotonic()
+        process = subprocess.Popen(self.command(cmd), stdin=subprocess.PIPE,\
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT,\
+                                   start_new_session=True)
+        try:
+            threading.Thread(target=self.feed, args=(process.stdin, input_text.encode()),\
+                             daemon=True).start()
+            fd = process.stdout.fileno()
+            chunks = []
+            while True:
+                wait, reason = self.wait_time(start)
+                if self.failure is None and not (wait is None)\
+                        and (wait <= 0 or not select.select([fd], [], [], wait)[0]):
+                    self.stop(process, cmd, reason, start)
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            process.wait()
+        finally:
+            if process.poll() is None:
+                self.kill(process)
+                process.wait()
+            process.stdout.close()
+        stdout = b''.join(chunks)
+        self.stats.count('bytes_read', len(stdout))
+        return stdout.decode(errors='replace')
+
+    @classmethod
+    def limit(cls):
+        """
+        return the semaphore bounding concurrent runs in the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in cls.semaphores:
+            cls.semaphores[loop] = asyncio.Semaphore(cls.max_concurrency)
+        return cls.semaphores[loop]
+
+    @staticmethod
+    async def feed_async(pipe, data):
+        try:
+            pipe.write(data)
+            await pipe.drain()
+            pipe.close()
+        except OSError:
+            pass
+
+    async def run_async(self, cmd, input_text):
+        """
+        coroutine version of run; waits for a free slot before starting cmd
+        """
+        async with self.limit():
+            self.stats.count('processes')
+            self.stats.count('bytes_written', len(input_text))
+            self.failure = None
+            start = time.monotonic()
+            process = await asyncio.create_subprocess_exec(*self.command(cmd),\
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,\
+                    start_new_session=True)
+            feeder = asyncio.ensure_future(self.feed_async(process.stdin, input_text.encode()))
+            try:
+                chunks = []
+                while True:
+                    wait, reason = self.wait_time(start)
+                    try:
+                        if not (wait is None) and wait <= 0:
+                            raise asyncio.TimeoutError
+                        chunk = await asyncio.wait_for(process.stdout.read(65536), wait)
+                    except asyncio.TimeoutError:
+                        self.stop(process, cmd, reason, start)
+                        chunks.append(await process.stdout.read())
+                        break
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                await process.wait()
+            finally:
+                feeder.cancel()
+                if process.returncode is None:
+                    self.kill(process)
+        stdout = b''.join(chunks)
+        self.stats.count('bytes_read', len(stdout))
+        return stdout.decode(errors='replace')
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,162 @@
+"""
+Benchmarks of Chrysopelea's own overhead
+
+The solvers are replaced by the deterministic stubs in benchmarks/stubs, so
+no AVL or XFOIL installation is needed and the timings measure geometry
+generation, file handling, process management and parsing rather than the
+aerodynamics.
+
+    python bench.py                          # print timings
+    python bench.py --save baseline.json     # record a baseline
+    python bench.py --compare baseline.json  # fail on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+from Avl import *
+
+Avl.avl_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                             shlex.quote(os.path.join(here, "stubs", "avl_stub.py")))
+Section.xfoil_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                                   shlex.quote(os.path.join(here, "stubs", "xfoil_stub.py")))
+
+sizes = (2, 10, 50, 100, 500)
+viscous_sizes = (2, 10)
+
+
+def configuration(n_sections):
+    """
+    swept, tapered wing with n_sections sections plus a two-section tail
+    """
+    a = Avl()
+    a.origin = (0.4, 0, 0)
+    wing = Surface("wing")
+    for i in range(n_sections):
+        eta = i/(n_sections - 1)
+        wing.add_Section(Naca("2412", position=(0.3*eta, 3*eta, 0), chord=1 - 0.5*eta))
+    a.add_Surface(wing)
+    tail = Surface("tail")
+    for y, chord in ((0, 0.5), (1, 0.4)):
+        sec = Naca("0010", position=(3, y, 0), chord=chord)
+        sec.add_Control(Control("elevator", xhinge=0.7))
+        tail.add_Section(sec)
+    a.add_Surface(tail)
+    return a
+
+
+def measure(function, repeat=5):
+    """
+    return the best time per call in seconds
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number))/number
+
+
+def startup(code, repeat=5):
+    """
+    return the best wall-clock time of a fresh interpreter running code
+    """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run():
+    results = {}
+    results["startup/python"] = startup("pass")
+    results["startup/import"] = startup("import sys; sys.path.insert(0, {!r}); import Avl"\
+                                        .format(os.path.dirname(here)))
+    tmp = tempfile.mkdtemp(prefix="chrysopelea-bench-")
+    for n in sizes:
+        a = configuration(n)
+        results["str/{}".format(n)] = measure(lambda: str(a))
+
+        path = os.path.join(tmp, "bench{}.avl".format(n))
+        a.write(path)
+        results["read/{}".format(n)] = measure(lambda: Avl(path))
+
+        def execute():
+            a.set_attitude(alpha=5)
+            a.execute()
+        a.compute_stability = True
+        a.compute_force_dist = True
+        a.compute_moment_dist = True
+        results["execute/{}".format(n)] = measure(execute)
+
+        results["get_output/{}".format(n)] = measure(lambda: a.get_output('Cma'))
+        results["parse_output/{}".format(n)] = measure(lambda: a.parse_output(a.output))
+        results["force_dist/{}".format(n)] = measure(lambda: a.force_dist())
+        results["moment_dist/{}".format(n)] = measure(lambda: a.moment_dist())
+
+        if n in viscous_sizes:
+            a.compute_stability = False
+            a.compute_force_dist = False
+            a.compute_moment_dist = False
+            a.reynolds = 5e5
+            results["execute_viscous/{}".format(n)] = measure(execute, repeat=3)
+
+    sec = Naca("2412")
+    sec.set_reynolds(5e5)
+    polar = sec.xfoil('\n'.join("alfa {}".format(alpha) for alpha in range(-5, 15)), 5e5)
+    results["read_polar/20"] = measure(lambda: Section.read_polar(polar))
+    sec.set_attitude(alpha=5)
+    results["section_execute"] = measure(sec.execute)
+    shutil.rmtree(tmp)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,\
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", help="write the timings to this JSON file")
+    parser.add_argument("--compare", help="compare against a JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=1.5,\
+                        help="slowdown factor reported as a regression (default 1.5)")
+    args = parser.parse_args()
+
+    results = run()
+    baseline = {}
+    if args.compare:
+        f = open(args.compare)
+        baseline = json.load(f)["benchmarks"]
+        f.close()
+
+    regressions = []
+    print("{:<24}{:>14}{:>14}{:>9}".format("benchmark", "time [ms]", "baseline", "ratio"))
+    for name in results:
+        line = "{:<24}{:>14.4f}".format(name, results[name]*1e3)
+        if name in baseline:
+            ratio = results[name]/baseline[name]
+            line += "{:>14.4f}{:>9.2f}".format(baseline[name]*1e3, ratio)
+            if ratio > args.tolerance:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        f = open(args.save, "w")
+        json.dump({"python": platform.python_version(), "machine": platform.machine(),\
+                   "benchmarks": results}, f, indent=2)
+        f.close()
+    if regressions:
+        print("{} regression(s): {}".format(len(regressions), ", ".join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
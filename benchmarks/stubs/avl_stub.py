@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+deterministic stand-in for the AVL executable
+
+Reads AVL commands from stdin exactly like AVL does (one menu line at a time)
+and answers with output laid out like AVL 3.x: prompts, the total forces
+block, stability derivatives and the "fs"/"vm" distribution files.  The
+numbers come from simple lifting-line estimates, so they are plausible but
+are not AVL results.
+"""
+import math
+import re
+import sys
+
+TOP_PROMPT = " AVL   c>  "
+OPER_PROMPT = " .OPER (case 1/1)   c>  "
+
+
+def write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def number(text):
+    return float(text.replace('D', 'E').replace('d', 'e'))
+
+
+class Geometry:
+
+    def __init__(self, file_name):
+        text = open(file_name).read()
+        text = re.sub('#.*', '', text)
+        blocks = re.split('SURFACE\n', text)
+        header = [e for e in re.split('\n|\t| ', blocks.pop(0)) if e != '']
+        self.name = header.pop(0)
+        values = [number(e) for e in header]
+        self.mach = values[0]
+        self.sref, self.cref, self.bref = values[4], values[5], values[6]
+        self.xref = values[7]
+        self.surfaces = []
+        self.controls = []
+        for block in blocks:
+            name = block.split('\n')[0].strip()
+            ydup = 'YDUPLICATE' in block
+            sections = []
+            for sect in block.split('SECTION')[1:]:
+                entries = [e for e in re.split('\n|\t| ', sect) if e != '']
+                sections.append([number(e) for e in entries[:4]])
+                for con in sect.split('CONTROL')[1:]:
+                    con = [e for e in re.split('\n|\t| ', con) if e != ''][0]
+                    if con not in self.controls:
+                        self.controls.append(con)
+            self.surfaces.append((name, ydup, sections))
+        self.aspect_ratio = self.bref**2/self.sref if self.sref else 1
+
+
+class Case:
+
+    def __init__(self, geom):
+        self.geom = geom
+        self.constraints = {'a': ('a', 0.0), 'b': ('b', 0.0)}
+
+    def lift_slope(self):
+        ar = self.geom.aspect_ratio
+        return 2*math.pi*ar/(ar + 2)
+
+    def solve(self):
+        geom = self.geom
+        cla = self.lift_slope()
+        kind, value = self.constraints['a']
+        if kind == 'c':
+            alpha = math.degrees(value/cla)
+        else:
+            alpha = value
+        beta = self.constraints['b'][1] if self.constraints['b'][0] == 'b' else 0.0
+        cl = cla*math.radians(alpha)
+        deflections = []
+        for n, con in enumerate(geom.controls):
+            kind, value = self.constraints.get('d{}'.format(n + 1), ('d', 0.0))
+            if kind == 'pm':
+                value = (0.05 - math.radians(alpha) - value)/0.01
+            elif not kind.startswith('d'):
+                value = 0.0
+            deflections.append(value)
+        self.alpha, self.beta, self.cl = alpha, beta, cl
+        self.deflections = deflections
+        self.e = 0.95 - 0.02/geom.aspect_ratio
+        self.cdi = cl**2/(math.pi*geom.aspect_ratio*self.e)
+        cm = 0.05 - math.radians(alpha)
+        if deflections:
+            cm -= 0.01*sum(deflections)
+        self.cm = cm
+        return abs(alpha) < 40
+
+    def total_forces(self):
+        g = self.geom
+        nstrip = sum(len(s[2])*4*(2 if s[1] else 1) for s in g.surfaces)
+        text = """
+ ---------------------------------------------------------------
+ Vortex Lattice Output -- Total Forces
+
+ Configuration: {name}
+     # Surfaces = {nsurf:3d}
+     # Strips   = {nstrip:3d}
+     # Vortices = {nvort:3d}
+
+  Sref = {sref:10.4f}       Cref = {cref:10.5f}       Bref = {bref:10.4f}
+  Xref = {xref:10.5f}       Yref =     0.0000       Zref =     0.0000
+
+ Standard axis orientation,  X fwd, Z down
+
+ Run case:  -unnamed-
+
+  Alpha = {alpha:10.5f}     pb/2V =   -0.00000     p'b/2V =   -0.00000
+  Beta  = {beta:10.5f}     qc/2V =    0.00000
+  Mach  = {mach:10.3f}     rb/2V =   -0.00000     r'b/2V =   -0.00000
+
+  CXtot = {cx:10.5f}     Cltot = {cltot:10.5f}     Cl'tot = {cltot:10.5f}
+  CYtot =   -0.00000     Cmtot = {cm:10.5f}
+  CZtot = {cz:10.5f}     Cntot = {cntot:10.5f}     Cn'tot = {cntot:10.5f}
+
+  CLtot = {cl:10.5f}
+  CDtot = {cdi:10.5f}
+  CDvis =    0.00000     CDind = {cdi:10.7f}
+  CLff  = {clff:10.5f}     CDff  = {cdff:10.7f}    | Trefftz
+  CYff  =   -0.00000         e = {e:10.4f}    | Plane
+
+""".format(name=g.name, nsurf=len(g.surfaces), nstrip=nstrip, nvort=5*nstrip,
+           sref=g.sref, cref=g.cref, bref=g.bref, xref=g.xref,
+           alpha=self.alpha, beta=self.beta, mach=g.mach,
+           cx=-self.cl*math.sin(math.radians(self.alpha)),
+           cltot=-0.002*self.beta, cntot=0.003*self.beta, cm=self.cm,
+           cz=-self.cl*math.cos(math.radians(self.alpha)), cl=self.cl,
+           cdi=self.cdi, clff=0.99*self.cl, cdff=0.99*self.cdi, e=self.e)
+        for con, value in zip(g.controls, self.deflections):
+            text += "   {:<16}= {:10.5f}\n".format(con, value)
+        text += "\n ---------------------------------------------------------------\n"
+        return text
+
+    def stability(self):
+        cla = self.lift_slope()
+        text = """
+ Stability-axis derivatives...
+
+                             alpha                beta
+                  ----------------     ----------------
+ z' force CL |    CLa = {cla:10.6f}     CLb =   0.000000
+ y  force CY |    CYa =   0.000000     CYb =  -0.250000
+ x' mom.  Cl'|    Cla =   0.000000     Clb =  -0.045000
+ y  mom.  Cm |    Cma = {cma:10.6f}     Cmb =   0.000000
+ z' mom.  Cn'|    Cna =   0.000000     Cnb =   0.062000
+
+                     roll rate  p'        pitch rate  q'        yaw rate  r'
+                  ----------------     ----------------     ----------------
+ z' force CL |    CLp =   0.000000     CLq =   6.500000     CLr =   0.000000
+ y  force CY |    CYp =  -0.120000     CYq =   0.000000     CYr =   0.210000
+ x' mom.  Cl'|    Clp =  -0.480000     Clq =   0.000000     Clr =   0.110000
+ y  mom.  Cm |    Cmp =   0.000000     Cmq = -11.200000     Cmr =   0.000000
+ z' mom.  Cn'|    Cnp =  -0.030000     Cnq =   0.000000     Cnr =  -0.095000
+""".format(cla=cla, cma=-1.0)
+        if self.geom.controls:
+            names = "".join("{:>14}   d{:<3d}".format(c, n + 1)
+                            for n, c in enumerate(self.geom.controls))
+            text += "\n              {}\n".format(names)
+            for axis, scale in (("z' force CL |", 0.012), ("y  force CY |", 0.003),
+                                ("x' mom.  Cl'|", 0.0005), ("y  mom.  Cm |", -0.01),
+                                ("z' mom.  Cn'|", 0.0008)):
+                name = axis.split()[2].rstrip("'|")
+                row = " " + axis
+                for n in range(len(self.geom.controls)):
+                    row += "   {:>5} = {:10.6f}".format("{}d{}".format(name, n + 1),
+                                                      scale*(n + 1))
+                text += row + "\n"
+        text += """
+
+ Neutral point  Xnp = {:10.6f}
+
+ Clb Cnr / Clr Cnb  =   1.530000    (  > 1 if spirally stable )
+""".format(self.geom.xref + 0.25*self.geom.cref)
+        return text
+
+    def strips(self, sections, ydup):
+        rows = []
+        for mirror in ([1, -1] if ydup else [1]):
+            for k in range(1, len(sections)):
+                s0, s1 = sections[k - 1], sections[k]
+                for i in range(4):
+                    f = (i + 0.5)/4
+                    xle = s0[0] + f*(s1[0] - s0[0])
+                    yle = mirror*(s0[1] + f*(s1[1] - s0[1]))
+                    zle = s0[2] + f*(s1[2] - s0[2])
+                    chord = s0[3] + f*(s1[3] - s0[3])
+                    width = abs(s1[1] - s0[1])/4
+                    cl = self.cl*math.sqrt(max(0.0, 1 - (yle/(0.51*self.geom.bref))**2))
+                    rows.append((xle, yle, zle, chord, chord*width,
+                                 cl*chord/self.geom.cref, -0.02*cl, cl, cl,
+                                 0.0, 0.0, -0.02, -0.25*cl - 0.02, 0.25))
+        return rows
+
+    def force_file(self, file_name):
+        out = open(file_name, 'w')
+        out.write("""
+ ---------------------------------------------------------------
+ Surface and Strip Forces by surface
+
+ Sref = {:10.4f}       Cref = {:10.5f}       Bref = {:10.4f}
+ Xref = {:10.5f}       Yref =     0.0000       Zref =     0.0000
+""".format(self.geom.sref, self.geom.cref, self.geom.bref, self.geom.xref))
+        j = 1
+        for n, (name, ydup, sections) in enumerate(self.geom.surfaces):
+            images = [(name, self.strips(sections, False))]
+            if ydup:
+                mirrored = self.strips(sections, True)[len(images[0][1]):]
+                images.append((name + " (YDUP)", mirrored))
+            for label, rows in images:
+                out.write("""
+ ---------------------------------------------------------------
+  Surface # {:2d}     {:<40}
+     # Chordwise =  5   # Spanwise = {:2d}     First strip = {:3d}
+     Surface area Ssurf = {:12.6f}     Ave. chord Cave = {:12.6f}
+
+ Forces referred to Sref, Cref, Bref about Xref, Yref, Zref
+ Standard axis orientation,  X fwd, Z down
+     CLsurf  = {:10.5f}     Clsurf  =   -0.00000
+     CYsurf  =   -0.00000     Cmsurf  = {:10.5f}
+     CDsurf  = {:10.5f}     Cnsurf  =    0.00000
+     CDisurf = {:10.5f}     CDvsurf =    0.00000
+
+ Strip Forces referred to Strip Area, Chord
+    j      Xle          Yle          Zle          Chord        Area         c cl         ai           cl_norm      cl           cd           cdv          cm_c/4       cm_LE        C.P.x/c
+""".format(n + 1, label, len(rows), j, sum(r[4] for r in rows),
+           sum(r[3] for r in rows)/len(rows), self.cl/2, self.cm/2, self.cdi/2, self.cdi/2))
+                for row in rows:
+                    out.write(" {:4d}".format(j) + "".join(" {:12.4f}".format(v) for v in row) + "\n")
+                    j += 1
+        out.write("\n")
+        out.close()
+
+    def moment_file(self, file_name):
+        out = open(file_name, 'w')
+        out.write("""
+ Shear force and bending moment distributions
+
+ Sref = {:10.4f}       Cref = {:10.5f}       Bref = {:10.4f}
+""".format(self.geom.sref, self.geom.cref, self.geom.bref))
+        for n, (name, ydup, sections) in enumerate(self.geom.surfaces):
+            ymax = max(abs(s[1]) for s in sections) or 1
+            out.write("""
+  Surface:  {:3d}   {}
+  Shear/q and bending moment/q vs. span
+  (referred to Sref, Bref)
+      2Y/Bref      Vz/(q*Sref)    Mx/(q*Bref*Sref)
+""".format(n + 1, name))
+            for i in range(11):
+                eta = i/10
+                load = self.cl*(1 - eta)**2/2
+                out.write(" {:12.5f} {:14.6f} {:14.6f}\n".format(
+                    eta*2*ymax/self.geom.bref, load, load*(1 - eta)/3))
+        out.write("\n")
+        out.close()
+
+
+def main():
+    geom = None
+    case = None
+    menu = "top"
+    pending = None
+    write("\n ===================================================\n"
+          "  Athena Vortex Lattice  Program      Version  3.36 (stub)\n"
+          " ===================================================\n\n" + TOP_PROMPT)
+    for raw in sys.stdin:
+        line = raw.strip()
+        words = line.split()
+        cmd = words[0].lower() if words else ""
+        if pending is not None:
+            kind, variable = pending
+            pending = None
+            if kind == "constraint":
+                if words:
+                    case.constraints[variable] = (words[0].lower(), number(words[1]) if len(words) > 1 else 0.0)
+            elif kind == "fs":
+                case.force_file(line)
+            elif kind == "vm":
+                case.moment_file(line)
+            write("\n" + OPER_PROMPT)
+            continue
+        if menu == "top":
+            if cmd == "load":
+                geom = Geometry(words[1])
+                case = Case(geom)
+                write("\n Reading file: {} ...\n Configuration: {}\n"
+                      "   Building surface: ...\n\n".format(words[1], geom.name) + TOP_PROMPT)
+            elif cmd == "oper":
+                menu = "oper"
+                write("\n Operation of run case 1/1:   -unnamed-\n"
+                      " ==========================================================\n\n" + OPER_PROMPT)
+            elif cmd == "plop":
+                menu = "plop"
+                write("\n  Plotting options:\n  G raphics-enable flag\n\n      Option, Value   (or <Return>)    c>  ")
+            elif cmd in ("quit", "q"):
+                return
+            else:
+                write("\n" + TOP_PROMPT)
+        elif menu == "plop":
+            if cmd == "":
+                menu = "top"
+                write("\n" + TOP_PROMPT)
+            else:
+                write("\n  Graphics-enable flag toggled\n\n      Option, Value   (or <Return>)    c>  ")
+        elif menu in ("trefftz", "geometry"):
+            if cmd == "h":
+                open("plot.ps", "w").write("%!PS-Adobe-2.0\n%%EOF\n")
+                write("\n  Hardcopy written\n\n  T>  ")
+            elif cmd == "":
+                menu = "oper"
+                write("\n" + OPER_PROMPT)
+            else:
+                write("\n  T>  ")
+        elif menu == "oper":
+            if cmd == "":
+                menu = "top"
+                write("\n" + TOP_PROMPT)
+            elif cmd == "x":
+                if case.solve():
+                    write(" Building ... \n   Solving ...\n" + case.total_forces() + "\n" + OPER_PROMPT)
+                else:
+                    write("\n  Trim convergence failed\n\n" + OPER_PROMPT)
+            elif cmd == "st":
+                write(case.stability() + "\n" + OPER_PROMPT)
+            elif cmd in ("fs", "vm"):
+                pending = (cmd, None)
+                write("\n Enter filename, or <return> for screen output   s>  ")
+            elif cmd == "t":
+                menu = "trefftz"
+                write("\n  T>  ")
+            elif cmd == "g":
+                menu = "geometry"
+                write("\n  G>  ")
+            elif re.fullmatch('[abrpy]|d[0-9]+', cmd) and len(words) == 1:
+                pending = ("constraint", cmd)
+                write("\n       Select new  constraint,value  for {}    c>  ".format(cmd))
+            else:
+                write("\n " + OPER_PROMPT)
+
+
+if __name__ == "__main__":
+    main()
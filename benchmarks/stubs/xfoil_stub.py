@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+deterministic stand-in for the XFOIL executable
+
+Understands the subset of XFOIL commands Chrysopelea sends (load/naca, oper,
+visc, iter, pacc, alfa, cl, aseq, cseq, init) and appends polar rows laid out
+like XFOIL 6.99 "pacc" files.  Viscous points converge only when the
+boundary-layer state is close enough to the previous converged point for the
+iteration limit, which mimics XFOIL's need for warm starts at high alpha.
+"""
+import math
+import os
+import sys
+
+TOP_PROMPT = "\n XFOIL   c>  "
+OPER_PROMPT = "\n.OPERi   c>  "
+VISC_PROMPT = "\n.OPERv   c>  "
+
+HEADER = """
+       XFOIL         Version 6.99
+
+ Calculated polar for: {name:<50}
+
+ 1 1 Reynolds number fixed          Mach number fixed
+
+ xtrf =   1.000 (top)        1.000 (bottom)
+ Mach =   0.000     Re = {re:10.3f} e 6     Ncrit =   9.000
+
+  alpha    CL        CD       CDp       CM     Top_Xtr  Bot_Xtr
+ ------ -------- --------- --------- -------- -------- --------
+"""
+
+
+def write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+class Foil:
+
+    def __init__(self):
+        self.name = ""
+        self.camber = 0.0
+        self.reynolds = 0
+        self.iterations = 20
+        self.polar = None
+        self.previous = None
+
+    def load(self, file_name):
+        lines = open(file_name).read().split('\n')
+        self.name = lines[0].strip()
+        upper = [float(l.split()[1]) for l in lines[1:] if len(l.split()) == 2]
+        self.camber = 0.02 if upper and max(upper) + min(upper) > 0.01 else 0.0
+
+    def naca(self, desig):
+        self.name = "NACA {}".format(desig)
+        self.camber = int(desig[0])/100 if desig[0].isdigit() else 0.0
+
+    def coefficients(self, alpha):
+        cl0 = 2*math.pi*self.camber*1.2
+        cl = cl0 + 0.11*alpha
+        if abs(alpha) > 12:
+            cl -= math.copysign(0.03*(abs(alpha) - 12)**2, alpha)
+        if self.reynolds:
+            cdp = 0.002 + 0.0004*alpha**2/10
+            cd = cdp + 2.4/math.sqrt(self.reynolds)
+        else:
+            cdp = -0.0001
+            cd = 0.0
+        cm = -0.25*cl0 - 0.001*alpha
+        top = min(1.0, max(0.01, 0.6 - 0.045*alpha))
+        bot = min(1.0, max(0.01, 0.6 + 0.045*alpha))
+        return alpha, cl, cd, cdp, cm, top, bot
+
+    def alpha_for_cl(self, cl):
+        return (cl - 2*math.pi*self.camber*1.2)/0.11
+
+    def solve(self, alpha):
+        """
+        return the number of iterations needed, or None when not converged
+        """
+        if not self.reynolds:
+            return 1
+        start = 0.0 if self.previous is None else self.previous
+        needed = 12 + 8*abs(alpha - start) + 25*max(0.0, abs(alpha) - 10)**1.5
+        if needed > self.iterations or abs(alpha) > 20:
+            self.previous = None
+            return None
+        self.previous = alpha
+        return int(needed)
+
+    def point(self, alpha):
+        iters = self.solve(alpha)
+        if iters is None:
+            write("\n VISCAL:  Convergence failed\n")
+            return
+        row = self.coefficients(alpha)
+        write("\n     a = {:7.3f}      CL = {:8.4f}\n    Cm = {:8.4f}     CD = {:9.5f}"
+              "   =>   CDf = {:9.5f}    CDp = {:9.5f}\n   ({} iterations)\n".format(
+                  row[0], row[1], row[4], row[2], row[2] - row[3], row[3], iters))
+        if self.polar:
+            out = open(self.polar, 'a')
+            out.write("  {:7.3f} {:8.4f} {:9.5f} {:9.5f} {:8.4f} {:8.4f} {:8.4f}\n".format(*row))
+            out.close()
+
+
+def frange(start, stop, step):
+    values = []
+    n = int(round((stop - start)/step)) if step else 0
+    for i in range(n + 1):
+        values.append(start + i*step)
+    return values
+
+
+def main():
+    foil = Foil()
+    menu = "top"
+    pending = []
+    write("\n ===================================================\n"
+          "  XFOIL Version 6.99 (stub)\n"
+          " ===================================================\n" + TOP_PROMPT)
+    for raw in sys.stdin:
+        line = raw.strip()
+        words = line.split()
+        cmd = words[0].lower() if words else ""
+        if pending:
+            what = pending.pop(0)
+            if what == "polar":
+                foil.polar = line
+                if not os.path.exists(line):
+                    # like XFOIL, a new polar file gets its header straight away
+                    out = open(line, 'w')
+                    out.write(HEADER.format(name=foil.name, re=foil.reynolds/1e6))
+                    out.close()
+                write("\n Enter  polar dump filename  s>  ")
+            elif what == "dump":
+                write("\n Polar accumulation enabled\n" + VISC_PROMPT)
+            continue
+        if menu == "top":
+            if cmd == "load":
+                foil.load(words[1])
+                write("\n Buffer airfoil set\n" + TOP_PROMPT)
+            elif cmd == "naca":
+                foil.naca(words[1])
+                write("\n Buffer airfoil set\n" + TOP_PROMPT)
+            elif cmd == "oper":
+                menu = "oper"
+                write(OPER_PROMPT)
+            elif cmd == "quit":
+                return
+            else:
+                write(TOP_PROMPT)
+        else:
+            if cmd == "":
+                menu = "top"
+                write(TOP_PROMPT)
+            elif cmd == "visc":
+                foil.reynolds = float(words[1])
+                foil.previous = None
+                write(VISC_PROMPT)
+            elif cmd == "iter":
+                foil.iterations = int(words[1])
+                write(VISC_PROMPT)
+            elif cmd == "init":
+                foil.previous = None
+                write("\n BL initialization on next point\n" + VISC_PROMPT)
+            elif cmd == "pacc":
+                pending = ["polar", "dump"]
+                write("\n Enter  polar save filename  OR  <return> for no file   s>  ")
+            elif cmd in ("alfa", "a"):
+                foil.point(float(words[1]))
+                write(VISC_PROMPT)
+            elif cmd == "cl":
+                foil.point(foil.alpha_for_cl(float(words[1])))
+                write(VISC_PROMPT)
+            elif cmd == "aseq":
+                for alpha in frange(*[float(w) for w in words[1:4]]):
+                    foil.point(alpha)
+                write(VISC_PROMPT)
+            elif cmd == "cseq":
+                for cl in frange(*[float(w) for w in words[1:4]]):
+                    foil.point(foil.alpha_for_cl(cl))
+                write(VISC_PROMPT)
+            else:
+                write(VISC_PROMPT)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +0,0 @@
-rm *.xin
-rm *.xout
-rm *.bl
-rm *.ain
-rm *.aout
-rm chrysopelea.avl
-rm plot.ps
@@ -271,127 +271,4 @@ class imperial_dynamic(dynamic):
 	force = "lb"
 	temperature = "R"
 
-############ lifting line class ##########
-
-class LiftingLine(object):
-
-	def __init__(self,n=100, chord='elipse',scale=0.1,x=0,y = 'cos',z=0):
-
-		if np.array_equal(y,'uniform'):
-			selfy = np.linspace(0.5/n,1-0.5/n,n)
-			self.elip = 2*np.sqrt(0.25-(selfy-0.5)**2)
-		elif np.array_equal(y,'cos'):
-			theta = np.linspace(0,math.pi,n+1)
-			yvec = -np.cos(theta)/2
-			self.elip = np.sin(np.linspace(0,math.pi,n))
-			selfy = 0.5*(yvec[1:] + yvec[:-1]) + 0.5
-		else:
-			selfy = y
-			self.elip = 2*np.sqrt(0.25-(selfy-0.5)**2)
-			n = len(y)
-
-		selfx = np.zeros(n) + x
-		selfz = np.zeros(n) + z
-		self.r = np.array([selfx,selfy,selfz])
-
-		self.kappa = np.zeros(n)
-		self.upwash= np.zeros(n)
-
-		if np.array_equal(chord,'uniform'):
-			self.chord = np.zeros(n) + scale
-		elif np.array_equal(chord,'elipse'):
-			self.chord = scale*np.sqrt(1-(2*self.r[1]-1)**2)
-		else:
-			self.chord = chord
-		self.set_mesh()
-
-	def set_mesh(self):
-		r0,r1 = 2*self.r[:,-1] - self.r[:,-2], 2*self.r[:,0] - self.r[:,1]
-		self.r_minus = (np.concatenate([np.array([r1]).transpose(), self.r[:,:-1]],1) + self.r)/2
-		self.r_plus = (np.concatenate([self.r[:,1:], np.array([r0]).transpose()],1) + self.r)/2
-		diff = self.r_plus - self.r_minus
-		self.space = diff[1]
-		self.arcspace = np.sqrt(diff[0]**2 + diff[1]**2 + diff[2]**2)
-		self.arclen = self.arcspace.sum()
-
-	@property
-	def ar(self):
-		return 1/sum(self.chord*self.space)
-	@property
-	def area(self):
-		return sum(self.chord*self.space)
-	@property
-	def CL(self):
-		return -2*sum(self.kappa*self.space)/sum(self.chord*self.space)
-	@property
-	def CDi(self):
-		return 2*sum(self.kappa*self.upwash*self.space)/sum(self.chord*self.space)
-	@property
-	def L(self):
-		return -sum(self.kappa*self.space)
-	@property
-	def D(self):
-		return sum(self.kappa*self.upwash*self.space)
-	@property
-	def e(self):
-		return (self.CL**2)/(math.pi*self.ar*self.CDi)
-	@property
-	def lengthwise_e(self):
-		return (2*self.L**2)/(math.pi*self.D*self.arclen**2)
-
-	def vcoef(self,x,y,z):
-		delta_y_plus,delta_z_plus = self.r_plus[1,:]-y,self.r_plus[2,:]-z
-		delta_y_minus,delta_z_minus = self.r_minus[1,:]-y,self.r_minus[2,:]-z
-		lat_dist_plus = np.sqrt(delta_y_plus**2 + delta_z_plus**2)
-		lat_dist_minus = np.sqrt(delta_y_minus**2 + delta_z_minus**2)
-		sweep_effect_plus = 2/math.pi*np.arctan( (x-self.r_plus[0,:])/lat_dist_plus) + 1
-		sweep_effect_minus = 2/math.pi*np.arctan( (x-self.r_minus[0,:])/lat_dist_minus) + 1
-		return (sweep_effect_plus*delta_y_plus/lat_dist_plus**2 - sweep_effect_minus*delta_y_minus/lat_dist_minus**2)/(4*math.pi)
-
-	def solve(self,alpha):
-		b = np.zeros(len(self.r[0]))+alpha
-		x,y,z = np.array([self.r[0]]).transpose(),np.array([self.r[1]]).transpose(),np.array([self.r[2]]).transpose()
-		vcoef = self.vcoef(x,y,z)
-		eqns = -vcoef - np.identity(len(y))/(math.pi*self.chord)
-		self.kappa = np.linalg.solve(eqns,b).flatten()
-		self.upwash = np.dot( vcoef ,self.kappa)
-	def solve_no_wash(self,alpha):
-		b = np.zeros(len(self.r[0]))+alpha
-		eqns = -np.identity(len(self.r[0]))/(math.pi*self.chord)
-		self.kappa = np.linalg.solve(eqns,b).flatten()
-		self.upwash *= 0
-
-	def plot(self):
-		n = len(self.space)
-		plt.plot(self.r[1],self.kappa)
-		elip = -self.elip*max(abs(self.kappa))
-		plt.plot(self.r[1],elip)
-		plt.plot(self.r[1],self.upwash)
-
-	def plot_circ(self):
-		circ = self.kappa/self.kappa.mean()
-		plt.plot(self.y,circ)
-
-	def plot_wash(self):
-		wash = self.upwash/self.upwash.min()
-		plt.plot(self.y,wash)
-
-	def plot_planform(self):
-		plt.axis('equal')
-		plt.scatter(self.r[0],self.r[1],color='k')
-		plt.scatter(self.r_plus[0],self.r_plus[1],color='r')
-		plt.scatter(self.r_minus[0],self.r_minus[1],color='r')
-		plt.plot(self.r[0]+0.75*self.chord,self.r[1],color='b')
-		plt.plot(self.r[0]-0.25*self.chord,self.r[1],color='b')
-
-	def print(self):
-		n = len(self.space)
-		print("cl",self.CL,"cdi",self.CDi)
-		print("ar",self.ar)
-		print("e",self.e)
-		print()
-		wash = self.upwash[int(n/2)]
-		print("wash",wash,'alpha',2*math.pi/180,"cdi/cl",self.CDi/self.CL)
-		alpha500 = 2*math.pi/180 + wash
-		print("correct",math.pi*self.chord[50]*alpha500, "actual", self.kappa[int(n/2)] )
-
+# LiftingLine now lives in LiftingLine.py
@@ -1,4 +1,5 @@
 from Avl import *
+import matplotlib.pyplot as plt
 
 # change the command to run AVL if the default does not work
 #Avl.avl_cmd = "~/programs/Avl/bin/avl" 
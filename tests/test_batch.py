@@ -0,0 +1,120 @@
+from Avl import *
+import os
+import shlex
+import signal
+import sys
+
+# the AVL stub of the benchmarks stands in for AVL; set on the object so
+# that copies sent to worker processes use it as well
+stub = "{} {}".format(shlex.quote(sys.executable),\
+                      shlex.quote(os.path.abspath("../benchmarks/stubs/avl_stub.py")))
+
+a = Avl()
+a.avl_cmd = stub
+a.origin = (0.4, 0, 0)
+wing = Surface("wing")
+wing.add_Section(Naca("2412", chord=1))
+wing.add_Section(Naca("2412", position=(0.3, 3, 0), chord=0.5))
+a.add_Surface(wing)
+tail = Surface("tail")
+for y, chord in ((0, 0.5), (1, 0.4)):
+    sec = Naca("0010", position=(3, y, 0), chord=chord)
+    sec.add_Control(Control("elevator", xhinge=0.7))
+    tail.add_Section(sec)
+a.add_Surface(tail)
+
+# reference results, one AVL process per case
+alphas = [0, 2, 4, 6]
+reference = []
+for alpha in alphas:
+    a.set_attitude(alpha=alpha)
+    a.execute()
+    reference.append((a.lift_coef(), a.get_output('Cmtot')))
+a.set_attitude(lift_coef=0.5)
+a.set(a.control_variables()['elevator'], 'pm 0')
+a.execute()
+trimmed = (a.get_output('Alpha'), a.get_output('elevator'))
+
+# many cases in one AVL process
+a.stats.reset()
+cases = [{'a': 'a {}'.format(alpha)} for alpha in alphas]
+results = a.execute_cases(cases)
+assert a.stats.summary()['avl_runs'] == 1
+assert [(r.lift_coef(), r.get_output('Cmtot')) for r in results] == reference
+assert all(r.converged for r in results)
+
+# cases setting different variables are independent, batched or not
+results = a.execute_cases([{'a': 'c 0.5', 'elevator': 'pm 0'}, {'b': 'b 0'}])
+assert (results[0].get_output('Alpha'), results[0].get_output('elevator')) == trimmed
+assert (results[1].get_output('Alpha'), results[1].get_output('elevator')) == (0, 0)
+mixed = [{'a': 'c 0.5', 'elevator': 'pm 0'}, {'a': 'a 2'}, {'b': 'b 2'}, {'elevator': 'd1 3'}]
+outputs = ('Alpha', 'Beta', 'elevator', 'Cmtot')
+single = a.sweep(mixed, outputs=outputs)
+for batched in (a.sweep(mixed, outputs=outputs, batch=2), a.sweep(mixed, outputs=outputs, batch=4)):
+    assert batched.equals(single)
+assert single['elevator'][1] == 0 and single['Alpha'][3] == 0
+a.solver = "vlm"
+vlm_cases = [{'a': 'c 0.5'}, {'b': 'b 2'}]
+assert a.sweep(vlm_cases, outputs=('Alpha',), batch=2).equals(a.sweep(vlm_cases, outputs=('Alpha',)))
+a.solver = "avl"
+
+# one persistent AVL process
+a.stats.reset()
+with a.session() as s:
+    for alpha in alphas:
+        a.set_attitude(alpha=alpha)
+        s.execute()
+        assert (a.lift_coef(), a.get_output('Cmtot')) == reference[alphas.index(alpha)]
+    a.set_attitude(lift_coef=0.5)
+    a.set(a.control_variables()['elevator'], 'pm 0')
+    s.execute()
+    assert (a.get_output('Alpha'), a.get_output('elevator')) == trimmed
+    # a changed geometry is used after load
+    wing.sections[1].chord = 0.4
+    s.load()
+    a.set_attitude(alpha=4)
+    s.execute()
+    assert a.lift_coef() != reference[2][0]
+    wing.sections[1].chord = 0.5
+assert s.process.poll() is not None
+assert a.stats.summary()['processes'] == 1
+
+# an unconverged case skips the viscous pass, as in execute
+Section.xfoil_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                                   shlex.quote("../benchmarks/stubs/xfoil_stub.py"))
+a.reynolds = 5e5
+with a.session() as s:
+    a.set_attitude(lift_coef=99)
+    s.execute()
+    assert not a.converged
+    a.set_attitude(alpha=4)
+    s.execute()
+    assert a.converged and a.drag_coef() > a.induced_drag_coef()
+a.reynolds = None
+
+# the watchdog limits apply to every case of a session
+Workspace.timeout = 0.5
+with a.session() as s:
+    os.kill(s.process.pid, signal.SIGSTOP)
+    a.set_attitude(alpha=4)
+    try:
+        s.execute()
+        message = ""
+    except Exception as e:
+        message = str(e)
+    assert "stopped by timeout" in message
+    assert s.process.wait(timeout=5) is not None
+Workspace.timeout = None
+
+# sweeps over threads, processes and batches agree with single runs
+for options in ({}, {'workers': 2}, {'processes': True, 'workers': 2},\
+                {'batch': 3}, {'processes': True, 'batch': 2}):
+    df = a.sweep(cases, outputs=('Alpha', 'lift_coef', 'Cmtot'), **options)
+    assert list(df['Alpha']) == alphas
+    assert list(zip(df['lift_coef'], df['Cmtot'])) == reference
+# the sweeping object is left untouched
+assert a.constraints == {}
+
+# unconverged cases give NaN outputs
+df = a.sweep([{'a': 'a 2'}, {'a': 'c 99'}], outputs=('Alpha', 'CLtot'))
+assert df['Alpha'].notna()[0] and df['CLtot'].isna()[1]
@@ -0,0 +1,67 @@
+from Avl import *
+import os
+import tempfile
+
+# designs are solved with the built-in VLM solver, so no AVL is needed
+def build(span, taper):
+    a = Avl()
+    a.solver = "vlm"
+    wing = Surface("wing")
+    wing.add_Section(Naca("2412", chord=1))
+    wing.add_Section(Naca("2412", position=(0, span/2, 0), chord=taper))
+    a.add_Surface(wing)
+    return a
+
+designs = Design.grid(span=[4, 6, 8], taper=[0.5, 1])
+assert len(designs) == 6
+
+samples = Design.latin_hypercube(10, seed=0, span=(4, 8), taper=(0.5, 1))
+assert len(samples) == 10
+# one sample in each tenth of every range
+assert sorted(int((s['span'] - 4)/0.4) for s in samples) == list(range(10))
+assert samples == Design.latin_hypercube(10, seed=0, span=(4, 8), taper=(0.5, 1))
+
+# interrupted run: the first half is stored, the rest is run on resume
+file_name = os.path.join(tempfile.mkdtemp(), "designs.jsonl")
+d = Design(build, case={'a': 'c 0.4'}, outputs=('Alpha', 'CDff'), file_name=file_name)
+d.run(designs[:3])
+calls = []
+def counting_build(**parameters):
+    calls.append(parameters)
+    return build(**parameters)
+d.builder = counting_build
+df = d.run(designs)
+assert len(calls) == 3
+assert list(df.columns) == ['span', 'taper', 'Alpha', 'CDff']
+assert len(df) == 6
+assert df['CDff'].notna().all()
+# longer wings need less alpha and have less induced drag for the same CL
+rect = df[df['taper'] == 1]
+assert rect['Alpha'].is_monotonic_decreasing
+assert rect['CDff'].is_monotonic_decreasing
+os.remove(file_name)
+
+# failed designs are stored, but run again on resume; builder bugs propagate
+file_name = os.path.join(tempfile.mkdtemp(), "failures.jsonl")
+def failing_build(span, taper):
+    if span > 6:
+        raise Exception("AVL not converged.")
+    return build(span, taper)
+d = Design(failing_build, case={'a': 'c 0.4'}, outputs=('CDff',), file_name=file_name)
+df = d.run(designs)
+assert df['CDff'].isna().sum() == 2
+assert len(d.completed()) == 4
+d.builder = build
+df = d.run(designs)
+assert df['CDff'].notna().all()
+assert len(d.completed()) == 6
+def broken_build(span, tapper):
+    return build(span, tapper)
+d = Design(broken_build, case={'a': 'c 0.4'}, outputs=('CDff',))
+try:
+    d.run(designs[:1])
+    raised = False
+except TypeError:
+    raised = True
+assert raised
+os.remove(file_name)
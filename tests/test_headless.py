@@ -0,0 +1,65 @@
+from Avl import *
+import shlex
+import sys
+
+# the AVL stub of the benchmarks stands in for AVL and accepts plop
+Avl.avl_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                             shlex.quote("../benchmarks/stubs/avl_stub.py"))
+
+a = Avl()
+wing = Surface("wing")
+wing.add_Section(Naca("2412", chord=1))
+wing.add_Section(Naca("2412", position=(0.3, 3, 0), chord=0.5))
+a.add_Surface(wing)
+Avl.headless = True
+
+def refusal(function, *args):
+    try:
+        function(*args)
+    except Exception as e:
+        return str(e)
+    return ""
+
+# graphics are turned off before the geometry is loaded
+with Workspace() as ws:
+    assert a.avl_text(ws, "\nx").lstrip('\n').startswith("plop\ng\n\nload ")
+Avl.headless = False
+with Workspace() as ws:
+    assert a.avl_text(ws, "\nx").lstrip('\n').startswith("load ")
+Avl.headless = True
+
+# Trefftz-plane data as numbers instead of a plot
+a.set_attitude(alpha=4)
+a.compute_force_dist = True
+a.execute()
+assert a.converged
+trefftz = a.trefftz()
+assert list(trefftz.columns) == ['Yle', 'Zle', 'c_cl', 'cl', 'cl_norm', 'ai']
+assert trefftz['Yle'].is_monotonic_increasing
+with a.session() as s:
+    a.set_attitude(alpha=4)
+    s.execute()
+    assert a.converged
+
+# plots are refused, and the pending constraints kept
+a.plot_treffitz = True
+a.set_attitude(alpha=6)
+assert "headless" in refusal(a.execute)
+assert "headless" in refusal(asyncio.run, a.execute_async())
+with a.session() as s:
+    assert "headless" in refusal(s.execute)
+assert a.constraints == {'a': 'a 6'}
+a.plot_treffitz = False
+assert "headless" in refusal(a.execute, "\ng\nk")
+assert "headless" in refusal(a.draw)
+assert a.constraints == {'a': 'a 6'}
+a.execute()
+assert a.angle_of_attack() == 6
+
+# pooled and batched runs refuse plots in any mode
+a.plot_treffitz = True
+for headless in (True, False):
+    Avl.headless = headless
+    assert "batched runs" in refusal(a.execute_cases, [{'a': 'a 2'}])
+    assert "pooled runs" in refusal(a.sweep, [{'a': 'a 2'}])
+Avl.headless = False
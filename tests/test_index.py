@@ -0,0 +1,31 @@
+from Avl import *
+
+a = Avl()
+wing = Surface("wing")
+wing.add_Section(Naca("2412", chord=1.5))
+wing.add_Section(Naca("2412", position=(1.5, 3, 0), chord=0.5))
+a.add_Surface(wing)
+tail = Surface("tail")
+sec0 = Naca("0010", position=(3, 0, 0), chord=0.7)
+sec0.add_Control(Control("elevator", xhinge=0.7))
+sec0.add_Control(Control("rudder", xhinge=0.7, signdup=-1))
+tail.add_Section(sec0)
+a.add_Surface(tail)
+assert a.control_variables() == {'elevator': 'd1', 'rudder': 'd2'}
+assert a.model_index()['sections'] == {'wing': 2, 'tail': 1}
+
+# the index follows changes made through the add methods, pop and scale
+sec1 = Naca("0010", position=(3, 1, -0.5), chord=0.5)
+tail.add_Section(sec1)
+sec1.add_Control(Control("rudder", xhinge=0.8, signdup=-1))
+sec1.add_Control(Control("trim tab", xhinge=0.9))
+assert a.control_variables() == {'elevator': 'd1', 'rudder': 'd2', 'trimtab': 'd3'}
+assert a.model_index()['section_count'] == 4
+a.set_attitude(alpha=2)
+a.pitch_trim = "elevator"
+a.set_attitude(alpha=2)
+assert a.constraints['d1'] == 'pm 0'
+
+a.pop("tail")
+assert a.control_variables() == {}
+assert a.model_index()['surfaces'] == ['wing']
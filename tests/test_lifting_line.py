@@ -0,0 +1,36 @@
+from Avl import *
+import math
+
+# elliptic planform: e close to 1 and the lifting-line lift slope
+l = LiftingLine(n=100, scale=0.1)
+assert abs(l.ar*math.pi/4*0.1 - 1) < 1e-2
+l.solve(math.radians(5))
+assert abs(l.e - 1) < 0.02
+assert abs(l.CL/(2*math.pi*math.radians(5)/(1 + 2/l.ar)) - 1) < 0.01
+
+# many angles at once give the same results as one at a time
+alphas = np.radians([-2, 0, 3, 8])
+l.solve(alphas)
+cl, cdi = l.CL, l.CDi
+for n in range(len(alphas)):
+    l.solve(alphas[n])
+    assert abs(l.CL - cl[n]) < 1e-12
+    assert abs(l.CDi - cdi[n]) < 1e-12
+
+# built from a surface: rectangular wing of aspect ratio 8
+surf = Surface("wing")
+surf.add_Section(Naca("0012", chord=1))
+surf.add_Section(Naca("0012", position=(0, 4, 0), chord=1))
+l = LiftingLine.from_surface(surf, 80)
+assert abs(l.ar - 8) < 0.05
+l.solve(math.radians(5))
+assert 0.9 < l.e < 1
+assert l.CL < 2*math.pi*math.radians(5)*8/10
+
+# twist washes out lift
+a = Avl()
+surf.sections[1].incidence = -4
+a.add_Surface(surf)
+twisted = LiftingLine.from_avl(a, 80)
+twisted.solve(math.radians(5))
+assert twisted.CL < l.CL
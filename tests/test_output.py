@@ -0,0 +1,179 @@
+from Avl import *
+
+# parsers of AVL output, checked against text in AVL's own format
+
+forces = """
+ Vortex Lattice Output -- Total Forces
+
+ Configuration: aircraft
+     # Surfaces =   4
+     # Strips   =  60
+     # Vortices = 300
+
+  Sref =  3.0000       Cref =  1.0000       Bref =  6.0000
+  Xref =  0.40000       Yref =  0.0000       Zref =  0.0000
+
+ Standard axis orientation,  X fwd, Z down
+
+ Run case:  -unnamed-
+
+  Alpha =   4.00000     pb/2V =   -0.00000     p'b/2V =   -0.00000
+  Beta  =   0.00000     qc/2V =    0.00000
+  Mach  =     0.000     rb/2V =   -0.00000     r'b/2V =   -0.00000
+
+  CXtot =  -0.01874     Cltot =   -0.00000     Cl'tot =   -0.00000
+  CYtot =   -0.00000     Cmtot =   -0.05210
+  CZtot =  -0.42317     Cntot =    0.00000     Cn'tot =    0.00000
+
+  CLtot =   0.42343
+  CDtot =   0.00999
+  CDvis =    0.00000     CDind = 0.0099883
+  CLff  =   0.42179     CDff  = 0.0097152    | Trefftz
+  CYff  =   -0.00000         e =    0.9713    | Plane
+
+   elevator        =   -1.25000
+   rudder          =    0.00000
+
+ ---------------------------------------------------------------
+"""
+
+stability = """
+ Stability-axis derivatives...
+
+                             alpha                beta
+                  ----------------    ----------------
+ z' force CL |    CLa =   4.896321    CLb =   0.000000
+ x' mom.  Cl'|    Cla =  -0.000000    Clb =  -0.021348
+ y  mom.  Cm |    Cma =  -1.208144    Cmb =   0.000000
+
+                  elevator     d01     rudder       d02
+                  ----------------    ----------------
+ z' force CL |   CLd01 =   0.006521   CLd02 =   0.000000
+ y  mom.  Cm |   Cmd01 =  -0.021760   Cmd02 =   0.000000
+
+ Neutral point  Xnp =   0.646751
+"""
+
+results = Avl.parse_output(forces + stability)
+assert results['Alpha'] == 4
+assert results['CLtot'] == 0.42343
+assert results['CDff'] == 0.0097152
+assert results['e'] == 0.9713
+assert results["Cl'tot"] == 0
+assert results['elevator'] == -1.25
+assert results['CLa'] == 4.896321
+assert results['Cmd01'] == -0.02176
+assert results['Xnp'] == 0.646751
+# the header is not part of the results
+assert 'Sref' in results and '#' not in results
+
+# only the last block counts, and within it the first value of a name
+earlier = forces.replace('4.00000', '2.00000').replace('0.42343', '0.21000')
+results = Avl.parse_output(earlier + forces + "\n  CLtot =   9.99999\n")
+assert results['Alpha'] == 4
+assert results['CLtot'] == 0.42343
+
+# no total forces: not converged
+assert Avl.parse_output(" Trim convergence failed\n CLtot = 0.4\n") == {}
+assert Avl.parse_output("") == {}
+
+# strip force (fs) and bending moment (vm) files
+strips = """
+ ---------------------------------------------------------------
+ Surface and Strip Forces by surface
+
+ ---------------------------------------------------------------
+  Surface #  1     wing
+     # Chordwise =  5   # Spanwise =  2     First strip =   1
+
+ Strip Forces referred to Strip Area, Chord
+    j      Xle          Yle          Zle          Chord        c cl         ai           cl_norm      cl
+    1       0.0000       0.7500       0.0000       0.9000       0.4500      -0.0100       0.5000       0.5000
+    2       0.1000       2.2500       0.0000       0.7000       0.2800      -0.0150       0.4000       0.4000
+
+ ---------------------------------------------------------------
+  Surface #  2     wing (YDUP)
+     # Chordwise =  5   # Spanwise =  2     First strip =   3
+
+ Strip Forces referred to Strip Area, Chord
+    j      Xle          Yle          Zle          Chord        c cl         ai           cl_norm      cl
+    3       0.1000      -2.2500       0.0000       0.7000       0.2800      -0.0150       0.4000       0.4000
+    4       0.0000      -0.7500       0.0000       0.9000       0.4500      -0.0100       0.5000       0.5000
+
+ ---------------------------------------------------------------
+  Surface #  3     horizontal tail
+     # Chordwise =  5   # Spanwise =  1     First strip =   5
+
+ Strip Forces referred to Strip Area, Chord
+    j      Xle          Yle          Zle          Chord        c cl         ai           cl_norm      cl
+    5       3.0000       0.5000       0.2000       0.4000      -0.0400       0.0050      -0.1000      -0.1000
+
+"""
+
+moments = """
+ Shear force and bending moment distributions
+
+  Surface:    1   wing
+  Shear/q and bending moment/q vs. span
+      2Y/Bref      Vz/(q*Sref)    Mx/(q*Bref*Sref)
+      0.00000       0.200000       0.050000
+      0.50000       0.050000       0.006250
+      1.00000       0.000000       0.000000
+
+  Surface:    2   wing (YDUP)
+  Shear/q and bending moment/q vs. span
+      2Y/Bref      Vz/(q*Sref)    Mx/(q*Bref*Sref)
+      0.00000       0.200000       0.050000
+
+  Surface:    3   horizontal tail
+  Shear/q and bending moment/q vs. span
+      2Y/Bref      Vz/(q*Sref)    Mx/(q*Bref*Sref)
+      0.00000      -0.010000      -0.001000
+      0.16667       0.000000       0.000000
+"""
+
+data, views = Avl.parse_tables(strips, True)
+assert len(data) == 5
+assert data.dtype.names == ('j', 'Xle', 'Yle', 'Zle', 'Chord', 'c_cl', 'ai', 'cl_norm', 'cl')
+assert list(views) == ['wing', 'horizontal tail']
+# a surface and its YDUP image are merged and sorted by Yle
+assert list(views['wing']['Yle']) == [-2.25, -0.75, 0.75, 2.25]
+assert list(views['wing']['j']) == [3, 4, 1, 2]
+assert list(views['horizontal tail']['cl']) == [-0.1]
+# the views share one array
+views['horizontal tail']['cl'] = 0
+assert data['cl'][-1] == 0
+
+data, views = Avl.parse_tables(moments, False)
+assert list(views) == ['wing', 'horizontal tail']
+assert len(views['wing']) == 3
+assert list(views['horizontal tail']['Mx/(q*Bref*Sref)']) == [-0.001, 0]
+data, views = Avl.parse_tables(" Surface and Strip Forces by surface\n", True)
+assert len(data) == 0 and views == {}
+
+# per-surface tables of an Avl object, parsed once per run
+a = Avl()
+wing = Surface("wing")
+wing.add_Section(Naca("2412", chord=1))
+wing.add_Section(Naca("2412", position=(0, 3, 0), chord=0.6))
+a.add_Surface(wing)
+tail = Surface("horizontal tail")
+tail.add_Section(Naca("0010", position=(3, 0, 0.2), chord=0.4))
+tail.add_Section(Naca("0010", position=(3, 1, 0.2), chord=0.4))
+a.add_Surface(tail)
+a.force_data = strips
+a.moment_data = moments
+table = a.force_dist(dataframe=False)
+assert list(table['Yle']) == [-2.25, -0.75, 0.75, 2.25]
+assert a.force_dist('horizontal tail', dataframe=False) is a.force_dist(tail, dataframe=False)
+assert list(a.force_dist(tail)['Zle']) == [0.2]
+assert list(a.moment_dist(tail)['2Y/Bref']) == [0, 0.16667]
+assert a.stats.summary()['force_dist']['calls'] == 4
+a.force_data = strips.replace('0.2000', '0.3000')
+assert list(a.force_dist(tail)['Zle']) == [0.3]
+
+# Trefftz-plane loading from the strip forces
+a.compute_force_dist = True
+trefftz = a.trefftz(dataframe=False)
+assert trefftz.dtype.names == ('Yle', 'Zle', 'c_cl', 'cl', 'cl_norm', 'ai')
+assert list(trefftz['c_cl']) == [0.28, 0.45, 0.45, 0.28]
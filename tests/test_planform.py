@@ -0,0 +1,32 @@
+from Surface import *
+
+# same results as the surface it was built from
+surf = Surface("wing")
+surf.add_Section(Naca("0012", chord=1))
+surf.add_Section(Naca("0012", position=(0.2, 1, 0.1), chord=0.6))
+surf.add_Section(Naca("0012", position=(0.5, 2, 0.3), chord=0.3))
+p = Planform.from_surface(surf)
+assert abs(p.area() - 2*(0.8 + 0.45)) < 1e-12
+assert abs(p.span() - 4) < 1e-12
+assert abs(p.aspect_ratio() - surf.aspect_ratio()) < 1e-12
+assert abs(p.drag_coef([0.01, 0.01, 0.01]) - 0.01*surf.mean_chord()*4/surf.area()) < 0.001
+
+# a batch of variants gives one value per variant
+variants = []
+for taper in [0.2, 0.5, 1]:
+    s = Surface("wing")
+    s.add_Section(Naca("0012", chord=1))
+    s.add_Section(Naca("0012", position=(0, 3, 0), chord=taper))
+    variants.append(s)
+batch = Planform.batch(variants)
+assert batch.chord.shape == (3, 2)
+assert np.allclose(batch.area(), [s.area() for s in variants])
+assert np.allclose(batch.mean_aerodynamic_chord(), [s.mean_aerodynamic_chord() for s in variants])
+assert np.allclose(batch.aspect_ratio(), [s.aspect_ratio() for s in variants])
+assert np.allclose(batch.drag_coef(np.full((3, 2), 0.01)), 0.01)
+
+# surfaces without an image, one per row
+fins = Planform([[[0, 0, 0], [0, 1, 0]], [[0, 0, 0], [0, 2, 0]]], [[1, 1], [1, 1]],\
+                yduplicate=[math.nan, math.nan])
+assert list(fins.span()) == [1, 2]
+assert list(fins.area()) == [1, 2]
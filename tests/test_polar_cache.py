@@ -0,0 +1,64 @@
+from Section import *
+import os
+import shlex
+import sys
+import tempfile
+
+# the XFOIL stub of the benchmarks stands in for XFOIL
+Section.xfoil_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                                   shlex.quote("../benchmarks/stubs/xfoil_stub.py"))
+
+file_name = os.path.join(tempfile.mkdtemp(), "polars.sqlite")
+cache = PolarCache(file_name, max_entries=3, memory_entries=1)
+Section.polar_cache = cache
+
+n = Naca("2412")
+n.stats = Stats()
+n.set_reynolds(1e6)
+n.set_attitude(alpha=4)
+n.execute()
+lift = n.lift_coef()
+assert (cache.hits, cache.misses) == (0, 1)
+n.execute()
+assert n.lift_coef() == lift
+assert (cache.hits, cache.misses) == (1, 1)
+assert n.stats.summary()['xfoil_runs'] == 1
+assert n.stats.summary()['polar_cache_hits'] == 1
+
+# the least recently used polar leaves memory but stays in the file
+n.set_attitude(alpha=6)
+n.execute()
+assert len(cache.memory) == 1
+n.set_attitude(alpha=4)
+n.execute()
+assert n.lift_coef() == lift
+assert (cache.hits, cache.misses) == (2, 2)
+assert n.stats.summary()['xfoil_runs'] == 2
+
+# a fresh cache on the same file starts from the stored polars
+Section.polar_cache = PolarCache(file_name, max_entries=3, memory_entries=1)
+n.execute()
+assert Section.polar_cache.hits == 1
+cache = Section.polar_cache
+
+# max_entries bounds the file, evicting the least recently used
+for alpha in (0, 1, 2):
+    n.set_attitude(alpha=alpha)
+    n.execute()
+assert len(cache) == 3
+n.set_attitude(alpha=4)
+n.execute()
+assert cache.misses == 4
+
+# invalidate forgets only the polars of the section's airfoil
+m = Naca("0012")
+m.set_reynolds(1e6)
+m.set_attitude(alpha=4)
+m.execute()
+cache.invalidate(n)
+assert len(cache) == 1
+m.execute()
+assert cache.hits == 2
+cache.invalidate()
+assert len(cache) == 0
+Section.polar_cache = None
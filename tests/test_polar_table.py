@@ -0,0 +1,85 @@
+from Avl import *
+import os
+import shlex
+import sys
+import tempfile
+
+# the stubs of the benchmarks stand in for AVL and XFOIL; the XFOIL stub
+# does not converge beyond 20 degrees
+Avl.avl_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                             shlex.quote("../benchmarks/stubs/avl_stub.py"))
+Section.xfoil_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                                   shlex.quote("../benchmarks/stubs/xfoil_stub.py"))
+
+n = Naca("2412")
+n.stats = Stats()
+table = PolarTable.build(n, [2e6, 5e5, 1e6], [10, 0, 5, 25])
+assert n.stats.summary()['xfoil_runs'] == 3
+assert list(table.reynolds) == [5e5, 1e6, 2e6]
+assert list(table.alphas) == [0, 5, 10, 25]
+assert np.isnan(table.data['CD'][:, 3]).all()
+assert not np.isnan(table.data['CD'][:, :3]).any()
+
+# tabulated points are XFOIL's results
+n.set_reynolds(1e6)
+n.set_attitude(alpha=5)
+n.execute()
+assert table.interpolate('CD', 1e6, 5) == n.drag_coef()
+assert table.interpolate('CL', 1e6, 5) == n.lift_coef()
+
+# bilinear in log(Reynolds) and alpha, for arrays of any matching shape
+d = table.data['CD']
+middle = table.interpolate('CD', math.sqrt(5e5*1e6), 2.5)
+assert abs(middle - d[:2, :2].mean()) < 1e-12
+values = table.interpolate('CD', [[5e5], [1e6]], [0, 5, 10])
+assert values.shape == (2, 3)
+assert np.allclose(values, d[:2, :3], rtol=1e-12)
+assert not table.flags([[5e5], [1e6]], [0, 5, 10])[1].any()
+
+# NaN next to unconverged cells and outside the table, told apart by flags
+reynolds = [1e6, 1e6, 1e6, 3e6]
+alphas = [8, 15, 30, 5]
+values = table.interpolate('CD', reynolds, alphas)
+assert list(np.isnan(values)) == [False, True, True, True]
+outside, unconverged = table.flags(reynolds, alphas)
+assert list(outside) == [False, False, True, True]
+assert list(unconverged) == [False, True, False, False]
+
+# save and load
+file_name = os.path.join(tempfile.mkdtemp(), "naca2412.npz")
+table.save(file_name)
+loaded = PolarTable.load(file_name)
+assert (loaded.reynolds == table.reynolds).all() and (loaded.alphas == table.alphas).all()
+for c in PolarTable.columns:
+    assert np.array_equal(loaded.data[c], table.data[c], equal_nan=True)
+
+# the viscous pass of an aircraft interpolates instead of running XFOIL
+a = Avl()
+wing = Surface("wing")
+for y in (0, 1.5, 3):
+    wing.add_Section(Naca("2412", position=(0, y, 0), chord=1))
+a.add_Surface(wing)
+tail = Surface("tail")
+for y in (0, 1):
+    tail.add_Section(Naca("0010", position=(3, y, 0), chord=0.5, incidence=-2))
+a.add_Surface(tail)
+a.reynolds = 5e5
+a.set_attitude(alpha=4)
+a.execute()
+drag = a.drag_coef()
+section_drags = [surf.section_drag_coefs() for surf in (wing, tail)]
+
+tables = a.use_polar_tables([2.5e5, 5e5, 1e6], [0, 2, 4, 8])
+assert len(tables) == 2
+assert wing.sections[2].polar_table is wing.sections[0].polar_table
+assert tail.sections[0].polar_table is not wing.sections[0].polar_table
+a.stats.reset()
+a.set_attitude(alpha=4)
+a.execute()
+assert a.converged
+assert 'xfoil_runs' not in a.stats.summary()
+assert all(sec.tabulated() for sec in wing.sections + tail.sections)
+for surf, cd in zip((wing, tail), section_drags):
+    assert np.allclose(surf.section_drag_coefs(), cd, rtol=1e-12)
+assert abs(a.drag_coef() - drag) < 1e-12
+assert 'xfoil_runs' not in a.stats.summary()
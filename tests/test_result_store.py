@@ -0,0 +1,51 @@
+from Avl import *
+import os
+import tempfile
+
+# uses the built-in VLM solver, so no AVL is needed
+file_name = os.path.join(tempfile.mkdtemp(), "results.sqlite")
+Avl.result_store = ResultStore(file_name, max_entries=3)
+
+a = Avl()
+a.solver = "vlm"
+wing = Surface("wing")
+wing.add_Section(Naca("2412", chord=1))
+wing.add_Section(Naca("2412", position=(0, 3, 0), chord=0.6))
+a.add_Surface(wing)
+
+a.set_attitude(alpha=4)
+a.execute()
+lift = a.lift_coef()
+a.set_attitude(alpha=4)
+a.execute()
+assert a.lift_coef() == lift
+assert a.stats.summary()['result_store_hits'] == 1
+assert a.stats.summary()['vlm']['calls'] == 1
+
+# a changed geometry is a different entry
+wing.sections[1].chord = 0.5
+a.set_attitude(alpha=4)
+a.execute()
+assert a.lift_coef() != lift
+assert len(Avl.result_store) == 2
+
+# size limit
+for alpha in (1, 2, 3):
+    a.set_attitude(alpha=alpha)
+    a.execute()
+assert len(Avl.result_store) == 3
+
+df = Avl.result_store.to_dataframe()
+assert sorted(df['Alpha']) == [1, 2, 3]
+
+# entries from another parser version are not used
+Avl.parser_version += 1
+a.set_attitude(alpha=3)
+a.execute()
+assert a.stats.summary()['result_store_misses'] == 6
+Avl.result_store.invalidate(Avl.parser_version)
+assert len(Avl.result_store) == 1
+
+Avl.parser_version -= 1
+Avl.result_store = None
+os.remove(file_name)
@@ -22,3 +22,30 @@ n.set_attitude(alpha=10)
 n.execute()
 assert round(n.lift_coef(), 2) == 1.08
 assert round(n.drag_coef(), 3) == 0.015
+
+# Test a whole polar from a single XFOIL run
+polar = n.polar_sweep(alphas=[-5, 0, 5, 10])
+assert list(polar['alpha']) == [-5, 0, 5, 10]
+assert round(polar.iloc[3]['CL'], 2) == 1.08
+assert round(polar.iloc[1]['CL'], 2) == 0.00
+
+# Test interpolation from a pre-computed polar table
+n.polar_table = PolarTable.build(n, [5e5, 1e6, 2e6], [0, 5, 10])
+assert round(n.lift_coef(), 2) == 1.08
+assert round(n.drag_coef(), 3) == 0.015
+outside, unconverged = n.polar_table.flags([1e5, 1e6], [5, 5])
+assert list(outside) == [True, False]
+
+# Test convergence-aware solutions marching from converged neighbours
+Section.warm_start = True
+n.polar_table = None
+n.set_attitude(alpha=10)
+n.execute()
+assert n.converged
+assert round(n.lift_coef(), 2) == 1.08
+polar = n.polar_sweep(alphas=[0, 10, 60], status=True)
+assert list(polar['converged']) == [True, True, False]
+n.set_attitude(alpha=60)
+n.execute()
+assert not n.converged
+Section.warm_start = False
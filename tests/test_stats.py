@@ -0,0 +1,79 @@
+from Avl import *
+import copy
+import pickle
+import shlex
+import sys
+
+# timings and counters
+events = []
+stats = Stats(callback=lambda kind, name, value: events.append((kind, name)))
+with stats.phase('viscous'):
+    for i in range(3):
+        with stats.phase('xfoil'):
+            stats.count('xfoil_runs')
+stats.count('bytes_read', 100)
+summary = stats.summary()
+assert summary['xfoil']['calls'] == 3
+assert summary['viscous']['calls'] == 1
+assert summary['viscous']['seconds'] >= summary['xfoil']['seconds']
+assert summary['xfoil_runs'] == 3 and summary['bytes_read'] == 100
+assert events.count(('count', 'xfoil_runs')) == 3
+assert ('time', 'viscous') in events
+assert 'xfoil' in str(stats)
+
+# copies report to the same stats, pickled ones collect their own
+assert copy.deepcopy(stats) is stats
+unpickled = pickle.loads(pickle.dumps(stats))
+assert unpickled.callback is None
+unpickled.count('xfoil_runs')
+assert stats.summary()['xfoil_runs'] == 3
+
+stats.reset()
+assert stats.summary() == {}
+stats.enabled = False
+with stats.phase('avl'):
+    stats.count('avl_runs')
+assert stats.summary() == {}
+
+# the execute paths report per phase, here with the stubs of the benchmarks
+Avl.avl_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                             shlex.quote("../benchmarks/stubs/avl_stub.py"))
+Section.xfoil_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                                   shlex.quote("../benchmarks/stubs/xfoil_stub.py"))
+a = Avl()
+wing = Surface("wing")
+wing.add_Section(Naca("2412", chord=1))
+wing.add_Section(Naca("2412", position=(0, 3, 0), chord=0.6))
+a.add_Surface(wing)
+a.reynolds = 5e5
+a.compute_force_dist = True
+a.set_attitude(alpha=4)
+a.execute()
+a.force_dist()
+summary = a.stats.summary()
+for phase in ('geometry', 'avl', 'parse', 'viscous', 'xfoil', 'polar_parse', 'force_dist'):
+    assert summary[phase]['calls'] >= 1, phase
+assert summary['avl_runs'] == 1
+assert summary['xfoil_runs'] == 2
+assert summary['processes'] == 3
+assert summary['bytes_written'] > 0 and summary['bytes_read'] > 0
+
+# sections of a wing report to its aircraft, or to their own stats
+assert wing.sections[0].recorder() is a.stats
+wing.sections[0].stats = Stats()
+a.set_attitude(alpha=4)
+a.stats.reset()
+a.execute()
+assert a.stats.summary()['xfoil_runs'] == 1
+assert wing.sections[0].stats.summary()['xfoil_runs'] == 1
+
+# the VLM solver is timed as well
+a.solver = "vlm"
+a.reynolds = None
+a.compute_force_dist = False
+a.stats.reset()
+a.set_attitude(alpha=4)
+a.execute()
+summary = a.stats.summary()
+assert summary['lattice']['calls'] == 1 and summary['vlm']['calls'] == 1
+assert 'avl_runs' not in summary
@@ -18,3 +18,19 @@ assert surf.mean_chord() == 0.75
 l = 0.5
 assert round(surf.mean_aerodynamic_chord(), 10) == round(2/3*1*(1 + l + l**2)/(1 + l), 10)
 assert surf.aspect_ratio() == 4/3
+
+# derived geometry is cached and follows changes to the sections
+surf.sections[1].chord = 1
+assert surf.area() == 1
+assert surf.aspect_ratio() == 1
+surf.sections[1].position = (0, 2, 0)
+assert surf.span() == 2
+surf.yduplicate = 0
+assert surf.area() == 4
+surf.add_Section(Naca("0012", position=(0, 3, 0)))
+assert list(surf.geometry()) == [6, 6, 1, 1, 6]
+fin = Surface("fin")
+fin.yduplicate = None
+fin.add_Section(Naca("0012"))
+fin.add_Section(Naca("0012", position=(0, 0, 1)))
+assert np.isnan(fin.geometry()[2])
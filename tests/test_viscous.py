@@ -0,0 +1,87 @@
+from Avl import *
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+
+# the stubs of the benchmarks stand in for AVL and XFOIL
+Avl.avl_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                             shlex.quote("../benchmarks/stubs/avl_stub.py"))
+Section.xfoil_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                                   shlex.quote("../benchmarks/stubs/xfoil_stub.py"))
+
+# a rectangular wing and a tail with one chord: equal sections share XFOIL runs
+a = Avl()
+wing = Surface("wing")
+for y in (0, 1.5, 3):
+    wing.add_Section(Naca("2412", position=(0, y, 0), chord=1))
+a.add_Surface(wing)
+tail = Surface("tail")
+for y in (0, 1):
+    tail.add_Section(Naca("0010", position=(3, y, 0), chord=0.5))
+a.add_Surface(tail)
+a.reynolds = 5e5
+
+a.set_attitude(alpha=4)
+a.execute()
+assert len(a.section_jobs()) == 2
+summary = a.stats.summary()
+assert summary['xfoil_runs'] == 2
+assert summary['shared_xfoil_jobs'] == 3
+for surf in (wing, tail):
+    first = surf.sections[0]
+    for sec in surf.sections[1:]:
+        assert sec.polar is first.polar
+        assert sec.converged == first.converged
+        assert sec.drag_coef() == first.drag_coef()
+assert wing.sections[0].drag_coef() != tail.sections[0].drag_coef()
+
+# a different incidence is a different job
+wing.sections[2].incidence = -2
+a.set_attitude(alpha=4)
+a.stats.reset()
+a.execute()
+assert a.stats.summary()['xfoil_runs'] == 3
+assert a.stats.summary()['shared_xfoil_jobs'] == 2
+assert wing.sections[2].drag_coef() != wing.sections[0].drag_coef()
+
+# so is a different Reynolds number, unless reynolds_tolerance merges them
+wing.sections[2].incidence = 0
+wing.sections[2].chord = 0.98
+a.set_attitude(alpha=4)
+a.stats.reset()
+a.execute()
+assert a.stats.summary()['xfoil_runs'] == 3
+a.reynolds_tolerance = 0.05
+a.set_attitude(alpha=4)
+a.stats.reset()
+a.execute()
+assert a.stats.summary()['xfoil_runs'] == 2
+
+# the same sharing in the coroutine path
+a.reynolds_tolerance = 0
+a.set_attitude(alpha=4)
+a.stats.reset()
+asyncio.run(a.execute_async())
+assert a.stats.summary()['xfoil_runs'] == 3
+assert a.stats.summary()['shared_xfoil_jobs'] == 2
+
+# coordinate files are hashed once per version, not once per job
+directory = tempfile.mkdtemp()
+file_name = os.path.join(directory, "SD7062.dat")
+shutil.copy("../airfoils/SD7062.dat", file_name)
+s = Section(file_name)
+identity = s.airfoil_identity()
+count = len(Section.airfoil_digests)
+for i in range(3):
+    assert Section(file_name).airfoil_identity() == identity
+assert len(Section.airfoil_digests) == count
+f = open(file_name, 'a')
+f.write("\n")
+f.close()
+os.utime(file_name, ns=(0, 10**9))
+assert s.airfoil_identity() != identity
+assert len(Section.airfoil_digests) == count + 1
+os.chdir(directory)
+assert Section("SD7062.dat").airfoil_identity() == s.airfoil_identity()
@@ -0,0 +1,107 @@
+from Avl import *
+import math
+import os
+import tempfile
+
+# The built-in vortex-lattice solver needs neither AVL nor XFOIL, so these
+# checks compare against theory rather than recorded AVL output.
+
+def elliptic_wing(aspect_ratio=8, n=40):
+    a = Avl()
+    a.solver = "vlm"
+    wing = Surface("wing", nchord=2)
+    c0 = 8/(math.pi*aspect_ratio)
+    for t in np.linspace(0, math.pi/2, n + 1):
+        chord = max(c0*math.cos(t), 1e-4)
+        wing.add_Section(Naca("0012", position=(0.25*(c0 - chord), math.sin(t), 0),\
+                              chord=chord, nspan=1, sspace=0))
+    a.add_Surface(wing)
+    return a
+
+# elliptic loading: e close to 1, lift slope below lifting-line theory
+a = elliptic_wing()
+a.set_attitude(alpha=5)
+a.execute()
+assert abs(a.spanwise_efficiency() - 1) < 0.03
+lifting_line = 2*math.pi*8/10*math.radians(5)
+assert 0.9*lifting_line < a.lift_coef() < lifting_line
+assert abs(a.get_output('CLtot') - a.lift_coef()) < 1e-3
+assert abs(a.induced_drag_coef() - a.lift_coef()**2/(math.pi*8)) < 3e-4
+
+# symmetric flow: no side force, roll or yaw
+for name in ('CYff', 'Cltot', 'Cntot'):
+    assert abs(a.get_output(name)) < 1e-10
+
+# lift grows like sin(alpha) and vanishes at zero for a symmetric airfoil
+cl5 = a.lift_coef()
+a.set_attitude(alpha=10)
+a.execute()
+assert abs(a.lift_coef()/cl5 - math.sin(math.radians(10))/math.sin(math.radians(5))) < 1e-2
+a.set_attitude(alpha=0)
+a.execute()
+assert abs(a.lift_coef()) < 1e-12
+
+# lift coefficient constraint
+a.set_attitude(lift_coef=0.3)
+a.execute()
+assert round(a.get_output('CLtot'), 8) == 0.3
+
+# a mirrored surface gives the same result as the explicit full wing
+def rectangular(full):
+    a = Avl()
+    a.solver = "vlm"
+    wing = Surface("wing")
+    if full:
+        wing.yduplicate = None
+        wing.add_Section(Naca("2412", position=(0, -2, 0), nspan=10, sspace=0))
+    wing.add_Section(Naca("2412", nspan=10, sspace=0))
+    wing.add_Section(Naca("2412", position=(0, 2, 0)))
+    a.add_Surface(wing)
+    a.set('a', 'a 4')
+    a.set('b', 'b 3')
+    a.execute()
+    return a
+half = rectangular(False)
+full = rectangular(True)
+for name in ('CLtot', 'CDind', 'CYtot', 'Cltot', 'Cmtot', 'Cntot', 'CLff', 'CDff'):
+    assert abs(half.get_output(name) - full.get_output(name)) < 1e-10
+
+# camber gives lift at zero alpha
+a = rectangular(False)
+a.set_attitude(alpha=0)
+a.execute()
+assert a.lift_coef() > 0.1
+
+# stability derivatives by finite differences
+a = elliptic_wing()
+tail = Surface("tail")
+tail.add_Section(Naca("0010", position=(3, 0, 0), chord=0.5))
+tail.add_Section(Naca("0010", position=(3, 1, 0), chord=0.5))
+a.add_Surface(tail)
+a.origin = (0.3, 0, 0)
+a.compute_stability = True
+a.set_attitude(alpha=2)
+a.execute()
+assert a.Cm_alpha() < 0
+assert a.aerodynamic_center() > a.origin[0]
+assert abs(a.CL_alpha()*math.radians(2)/a.get_output('CLtot') - 1) < 1e-2
+
+# a geometry written to a file and read back gives the same lattice
+file_name = os.path.join(tempfile.mkdtemp(), "wing.avl")
+a = Avl()
+a.solver = "vlm"
+wing = Surface("wing")
+wing.add_Section(Section("../airfoils/SD7062.dat", chord=1, nspan=10, sspace=1))
+wing.add_Section(Section("../airfoils/SD7062.dat", position=(0.3, 3, 0), chord=0.5,\
+                         incidence=-1.5, nspan=6, sspace=-2.5))
+a.add_Surface(wing)
+a.write(file_name)
+b = Avl(file_name)
+b.solver = "vlm"
+sections = b.surfaces['wing'].sections
+assert [(s.nspan, s.sspace, s.incidence) for s in sections] == [(10, 1, 0), (6, -2.5, -1.5)]
+for avl in (a, b):
+    avl.set_attitude(alpha=4)
+    avl.execute()
+assert b.lift_coef() == a.lift_coef()
+assert b.induced_drag_coef() == a.induced_drag_coef()
@@ -0,0 +1,76 @@
+from Section import *
+import shlex
+import sys
+
+# the XFOIL stub of the benchmarks models convergence: the iterations a
+# point needs grow with the step from the previous point and beyond 10
+# degrees, and nothing converges beyond 20 degrees
+Section.xfoil_cmd = "{} {}".format(shlex.quote(sys.executable),\
+                                   shlex.quote("../benchmarks/stubs/xfoil_stub.py"))
+
+def solve(section, alpha):
+    section.stats = Stats()
+    section.set_attitude(alpha=alpha)
+    section.execute()
+    summary = section.stats.summary()
+    return (section.converged, section.attempts, summary['xfoil_runs'],\
+            summary.get('xfoil_retries', 0), summary.get('xfoil_unconverged', 0))
+
+n = Naca("2412")
+n.set_reynolds(1e6)
+
+# a point that converges cold costs no more with warm_start
+assert solve(n, 14) == (True, 1, 1, 0, 0)
+n.warm_start = True
+assert solve(n, 14) == (True, 1, 1, 0, 0)
+
+# with too few iterations to converge cold, marching in finer steps does
+n.number_iterations = 200
+n.warm_start = False
+assert solve(n, 14) == (False, 1, 1, 0, 1)
+try:
+    n.lift_coef()
+    raised = False
+except Exception:
+    raised = True
+assert raised
+n.warm_start = True
+assert solve(n, 14) == (True, 3, 3, 2, 0)
+assert list(n.polar['alpha']) == [14] and round(n.lift_coef(), 2) == 1.57
+# every attempt is made for a point that never converges
+assert solve(n, 25) == (False, 4, 4, 3, 1)
+# the schedule is part of the job, so cached polars are not mixed up
+key = n.job_key()
+n.march_schedule = ((1, 500),)
+assert n.job_key() != key
+assert solve(n, 14) == (True, 2, 2, 1, 0)
+del n.march_schedule
+
+# whole polars: unconverged points are retried together, status marks the rest
+n.stats = Stats()
+alphas = [-3, 5, 14, 25]
+polar = n.polar_sweep(alphas=alphas, status=True)
+assert list(polar['alpha']) == alphas
+assert list(polar['converged']) == [True, True, True, False]
+assert polar['CL'].isna().tolist() == [False, False, False, True]
+assert n.stats.summary()['xfoil_runs'] == 4
+n.warm_start = False
+polar = n.polar_sweep(alphas=alphas, status=True)
+assert list(polar['converged']) == [True, True, False, False]
+assert list(n.polar_sweep(alphas=alphas)['alpha']) == [-3, 5]
+
+# no retry after the watchdog stopped XFOIL
+n.warm_start = True
+Workspace.timeout = 0.01
+assert solve(n, 14) == (False, 1, 1, 0, 1)
+assert n.failure.reason == 'timeout'
+try:
+    n.lift_coef()
+    message = ""
+except Exception as e:
+    message = str(e)
+assert "timeout" in message
+n.stats = Stats()
+n.polar_sweep(alphas=alphas)
+assert n.stats.summary()['xfoil_runs'] == 1
+Workspace.timeout = None
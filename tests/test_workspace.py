@@ -0,0 +1,37 @@
+from Workspace import *
+import asyncio
+import shlex
+import sys
+import time
+
+# a solver that prints one line and then hangs
+hang = "{} -c {}".format(shlex.quote(sys.executable),\
+                         shlex.quote("import time; print('started', flush=True); time.sleep(60)"))
+echo = "{} -c {}".format(shlex.quote(sys.executable),\
+                         shlex.quote("import sys; print(sys.stdin.read().upper())"))
+
+# without limits a run behaves as before
+with Workspace() as ws:
+    assert ws.run(echo, "oper\n").strip() == "OPER"
+    assert ws.failure is None
+
+# inactivity: stopped soon after the last output, returning it
+Workspace.inactivity_timeout = 0.5
+with Workspace() as ws:
+    start = time.monotonic()
+    out = ws.run(hang, "")
+    assert time.monotonic() - start < 5
+    assert out.strip() == "started"
+    assert ws.failure.reason == 'inactivity'
+    assert ws.run(echo, "x").strip() == "X"
+    assert ws.failure is None
+Workspace.inactivity_timeout = None
+
+# wall clock, also for run_async
+Workspace.timeout = 0.5
+with Workspace() as ws:
+    out = asyncio.run(ws.run_async(hang, ""))
+    assert out.strip() == "started"
+    assert ws.failure.reason == 'timeout'
+    assert ws.failure.seconds < 5
+Workspace.timeout = None